@@ -0,0 +1,77 @@
+"""
+Compares the wire formats of the TLS client bridge on the Python side of the exchange:
+encoding a request payload, decoding the bridge response and building the Response.
+
+Usage (from apps/scraper-py): `python -m benchmarks.bridge_codec [body size in MB]`
+"""
+
+import base64
+import os
+import sys
+from json import dumps
+from time import perf_counter
+
+from src.requests.client import BRIDGE_CODECS
+from src.requests.cookies import RequestsCookieJar, cookiejar_to_list
+from src.requests.response import build_response
+
+
+def make_request_payload(cookies: int) -> dict:
+    jar = RequestsCookieJar()
+    for i in range(cookies):
+        jar.set(f"cookie{i}", "x" * 32, domain="example.com", path="/")
+    return {
+        "sessionId": "benchmark",
+        "followRedirects": True,
+        "headers": {"User-Agent": "Mozilla/5.0", "Accept": "*/*"},
+        "headerOrder": None,
+        "proxyUrl": None,
+        "requestUrl": "https://example.com/sitemap.xml",
+        "requestMethod": "GET",
+        "requestBody": None,
+        "requestCookies": cookiejar_to_list(jar),
+        "additionalDecode": None,
+        "tlsClientIdentifier": "chrome_117",
+    }
+
+
+def make_response(body: str | bytes) -> bytes:
+    is_base64 = isinstance(body, bytes)
+    response = {
+        "status": 200,
+        "target": "https://example.com/sitemap.xml",
+        "headers": {"Content-Type": ["application/xml"]},
+        "body": base64.b64encode(body).decode() if is_base64 else body,
+        "isBase64": is_base64,
+    }
+    return dumps({"isHistory": False, "response": response}).encode()
+
+
+def run(codec, payload: dict, data: bytes, repeat: int) -> float:
+    start = perf_counter()
+    for _ in range(repeat):
+        codec.encode_request(payload)
+        response_object = codec.decode_response(data)
+        # reading the content forces the lazy body decode
+        _ = build_response(response_object["response"], RequestsCookieJar(), None).content
+    return (perf_counter() - start) / repeat
+
+
+def main(size_mb: float, repeat: int = 10) -> None:
+    size = int(size_mb * 1e6)
+    payload = make_request_payload(cookies=50)
+    bodies = {
+        "text": ("<url><loc>https://example.com/a</loc></url>\n" * (size // 44 + 1))[:size],
+        "binary": os.urandom(size),
+    }
+    for kind, body in bodies.items():
+        data = make_response(body)
+        timings = {name: run(codec, payload, data, repeat) for name, codec in BRIDGE_CODECS.items()}
+        print(
+            f"{kind} body ({size_mb} MB, {len(data) / 1e6:.1f} MB on the wire): "
+            + ", ".join(f"{name} {t * 1e3:.1f} ms" for name, t in timings.items())
+        )
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5)
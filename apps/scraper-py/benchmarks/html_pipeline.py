@@ -0,0 +1,75 @@
+"""
+Compares the single-parse HTML pipeline with the previous double-parse path.
+
+Usage (from apps/scraper-py): `python -m benchmarks.html_pipeline <dir with saved .html pages>`
+"""
+
+import sys
+from pathlib import Path
+from time import perf_counter
+
+from bs4 import BeautifulSoup
+from markdownify import markdownify as md
+
+from src.scrape_helpers import CHECK_BOT_RE, is_bot_detected
+from src.utils import CHALLENGE_IFRAME_TITLE, parse_page
+
+
+def legacy_convert_to_markdown(html: str, remove_ul: bool = True) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    tags_to_remove = ["a", "img"] + (["ul", "ol", "li"] if remove_ul else [])
+    for element in soup.find_all(tags_to_remove):
+        if element.name == "a":
+            element.replace_with(element.get_text())
+        else:
+            element.decompose()
+    return md(str(soup))
+
+
+def legacy_pipeline(html: str) -> tuple[str, bool]:
+    markdown = legacy_convert_to_markdown(html)
+    # check_bot_is_detected converted the page a second time and then scanned iframes
+    bot_md = legacy_convert_to_markdown(html)
+    iframes = BeautifulSoup(html, "html.parser").find_all("iframe")
+    has_challenge = any(
+        CHALLENGE_IFRAME_TITLE in (el.get("title") or "").casefold() for el in iframes
+    )
+    return markdown, bool(CHECK_BOT_RE.search(bot_md)) or has_challenge
+
+
+def single_parse_pipeline(html: str) -> tuple[str, bool]:
+    parsed = parse_page(html)
+    return parsed.markdown, is_bot_detected(parsed)
+
+
+def measure(fn, pages: list[str], repeat: int) -> tuple[float, list[tuple[str, bool]]]:
+    outputs = []
+    start = perf_counter()
+    for _ in range(repeat):
+        outputs = [fn(html) for html in pages]
+    return (perf_counter() - start) / repeat, outputs
+
+
+def main(corpus_dir: str, repeat: int = 3) -> None:
+    pages = [path.read_text(errors="replace") for path in sorted(Path(corpus_dir).glob("*.html"))]
+    if not pages:
+        print(f"No .html pages found in {corpus_dir}")
+        return
+
+    size_mb = sum(len(html) for html in pages) / 1e6
+    legacy_time, legacy_out = measure(legacy_pipeline, pages, repeat)
+    new_time, new_out = measure(single_parse_pipeline, pages, repeat)
+
+    verdict_mismatches = sum(old[1] != new[1] for old, new in zip(legacy_out, new_out, strict=True))
+    print(f"pages: {len(pages)} ({size_mb:.1f} MB), repeat: {repeat}")
+    print(f"legacy: {legacy_time * 1e3 / len(pages):.1f} ms/page")
+    print(f"single-parse: {new_time * 1e3 / len(pages):.1f} ms/page")
+    print(f"speedup: {legacy_time / new_time:.2f}x")
+    print(f"bot verdict mismatches: {verdict_mismatches}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,74 @@
+"""
+Compares the streaming sitemap parser with the previous gunzip + BeautifulSoup path
+on a generated gzipped sitemap shard.
+
+Usage (from apps/scraper-py): `python -m benchmarks.sitemap_parser [number of urls]`
+"""
+
+import gzip
+import sys
+import tracemalloc
+from datetime import UTC, datetime, timedelta
+from time import perf_counter
+
+from bs4 import BeautifulSoup
+
+from src.sitemap_parser_utils import gunzip, iter_sitemap_links
+
+SINCE = datetime(2024, 1, 20, tzinfo=UTC)
+
+
+def generate_sitemap(count: int) -> bytes:
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    entries = "".join(
+        f"<url><loc>https://example.com/news/{i}/some-article-title</loc>"
+        f"<lastmod>{(start + timedelta(minutes=i)).isoformat()}</lastmod>"
+        "<changefreq>daily</changefreq></url>"
+        for i in range(count)
+    )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{entries}</urlset>"
+    )
+    return gzip.compress(xml.encode())
+
+
+def legacy_links(data: bytes) -> list[str]:
+    root = BeautifulSoup(gunzip(data), "lxml-xml")
+    links = []
+    for entry in root.select("url"):
+        loc = entry.select_one("loc")
+        lastmod = entry.select_one("lastmod")
+        lastmod = datetime.fromisoformat(lastmod.text.strip()) if lastmod else None
+        if loc is not None and lastmod and lastmod >= SINCE:
+            links.append(loc.text.strip())
+    return links
+
+
+def streaming_links(data: bytes) -> list[str]:
+    return [link["loc"] for link in iter_sitemap_links(data, since=SINCE)]
+
+
+def measure(fn, data: bytes) -> tuple[float, float, list[str]]:
+    tracemalloc.start()
+    start = perf_counter()
+    links = fn(data)
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, links
+
+
+def main(count: int) -> None:
+    data = generate_sitemap(count)
+    print(f"urls: {count}, gzipped size: {len(data) / 1e6:.1f} MB")
+    legacy_time, legacy_peak, legacy = measure(legacy_links, data)
+    new_time, new_peak, new = measure(streaming_links, data)
+    print(f"legacy: {legacy_time:.2f} s, peak {legacy_peak:.0f} MB")
+    print(f"streaming: {new_time:.2f} s, peak {new_peak:.0f} MB")
+    print(f"same links: {legacy == new} ({len(new)} in window)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,151 @@
+"""
+Seeds a `tasks` table with millions of rows in a scratch schema of a local Postgres,
+then checks that the hot task queries use the indexes declared on `Task` and don't
+scan the table, printing their plans' timings. The claim is the statement
+`TaskHelper.claim_tasks` runs for `TaskExecutor.process_pending`, it's rolled back after.
+
+The schema is dropped and recreated on every run, the rest of the database isn't touched.
+
+Usage (from apps/scraper-py):
+`python -m benchmarks.task_queries postgresql://localhost/scraper [number of tasks]`
+"""
+
+import json
+import sys
+from datetime import datetime
+from time import perf_counter
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from src.models import Base
+from src.registry import REGISTRY
+from src.settings import settings
+from src.task_helper import TaskHelper
+
+SCHEMA = "bench_task_queries"
+PAGE_SIZE = 50
+
+# A task out of 20 is the child of a parent created just before it,
+# most tasks are done, a few are waiting or running
+SEED = """
+INSERT INTO tasks (
+    status, sort_id, scraper_name, is_sync, parent_task_id, started_at,
+    data, meta_data, result_count, cached_key
+)
+SELECT
+    CASE
+        WHEN i % 100 < 2 THEN 'pending'
+        WHEN i % 100 = 2 THEN 'in_progress'
+        WHEN i % 100 < 6 THEN 'failed'
+        ELSE 'completed'
+    END,
+    1700000000 + i / 50,
+    'scrape_md',
+    i % 7 = 0,
+    CASE WHEN i % 20 = 0 THEN i - 1 END,
+    now() - make_interval(secs => i % 3600),
+    json_build_object('url', 'https://example.com/page/' || i),
+    '{}'::json,
+    1,
+    'scrape_md-' || md5((i % (:count / 2))::text)
+FROM generate_series(1, :count) AS i
+"""
+
+# name, SQL, index the plan must use
+QUERIES = [
+    (
+        "list by page",
+        "SELECT id FROM tasks ORDER BY sort_id DESC, id DESC LIMIT :limit OFFSET 5000",
+        "ix_tasks_sort_id_id",
+    ),
+    (
+        "list by cursor",
+        "SELECT id FROM tasks WHERE (sort_id, id) < (:sort_id, :id) "
+        "ORDER BY sort_id DESC, id DESC LIMIT :limit",
+        "ix_tasks_sort_id_id",
+    ),
+    (
+        "children of a task",
+        "SELECT count(*) FROM tasks WHERE parent_task_id = :parent_id",
+        "ix_tasks_parent_task_id",
+    ),
+    (
+        "claim",
+        None,  # see `claim_sql`
+        "ix_tasks_claim_queue",
+    ),
+]
+
+
+def claim_sql() -> str:
+    statement = TaskHelper.claim_statement(
+        datetime.now(),
+        limit=settings.task_pull_batch_size,
+        reclaim_after_sec=settings.task_claim_stale_sec,
+        scraper_names=REGISTRY.get_scrapers_names(),
+    )
+    return str(
+        statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def seed(connection, count: int) -> None:
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    connection.execute(text(f"SET search_path TO {SCHEMA}"))
+    Base.metadata.create_all(connection)
+    start = perf_counter()
+    connection.execute(text(SEED), {"count": count})
+    connection.execute(text("ANALYZE tasks"))
+    print(f"seeded {count} tasks in {perf_counter() - start:.1f} s")
+
+
+def main(db_url: str, count: int) -> None:
+    engine = create_engine(db_url)
+    failures = []
+    with engine.begin() as connection:
+        seed(connection, count)
+        params = {
+            "limit": PAGE_SIZE,
+            "sort_id": 1700000000 + count // 100,
+            "id": count // 2,
+            # every 20th task is a child of the one before it
+            "parent_id": count // 40 * 20 - 1,
+        }
+        for name, sql, expected_index in QUERIES:
+            # EXPLAIN ANALYZE runs the statement, the claim's updates are rolled back
+            savepoint = connection.begin_nested()
+            if sql is None:
+                # literal timestamps would be taken for bind parameters by `text`
+                result = connection.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {claim_sql()}")
+            else:
+                result = connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params)
+            plan = result.scalar()
+            savepoint.rollback()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(plan_nodes(plan[0]["Plan"]))
+            indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+            seq_scans = [node for node in nodes if node["Node Type"] == "Seq Scan"]
+            ok = expected_index in indexes and not seq_scans
+            print(
+                f"{'ok ' if ok else 'BAD'} {name}: {plan[0]['Execution Time']:.2f} ms, "
+                f"indexes {sorted(indexes)}{', seq scan' if seq_scans else ''}"
+            )
+            if not ok:
+                failures.append(name)
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    engine.dispose()
+    if failures:
+        sys.exit(f"Queries without the expected index: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000)
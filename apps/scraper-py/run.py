@@ -1,17 +1,28 @@
 import asyncio
 import sys
 
-from src.app import run_server
-from src.temporal_worker import run_worker as run_temporal_worker
-
 
 def run():
     main_arg = sys.argv[1] if len(sys.argv) >= 2 else "backend"
 
+    # Imported lazily: conversion pool workers re-import this module when they start
+    # and shouldn't load the app, Temporal or the browsers along with it
     if main_arg == "backend":
+        from src.app import run_server
+
         run_server()
     elif main_arg == "worker":
+        from src.temporal_worker import run_worker as run_temporal_worker
+
         asyncio.run(run_temporal_worker())
+    elif main_arg == "puller":
+        from src.task_puller import run_puller
+
+        asyncio.run(run_puller())
+    elif main_arg == "migrate":
+        from src.db_setup import run_index_migrations
+
+        run_index_migrations()
     else:
         print(f"Invalid argument: {main_arg}")
         sys.exit(1)
@@ -4,6 +4,7 @@ from temporalio import activity
 from temporalio.exceptions import ApplicationError
 
 from .exceptions import BotDetectedException
+from .settings import settings
 from .task_executor import TaskExecutor
 
 
@@ -20,10 +21,27 @@ class NonRetryableError(ApplicationError):
 executor = TaskExecutor()
 
 
+def reclaim_after_sec() -> float | None:
+    """
+    A retried activity takes over the tasks its previous attempt claimed once they look
+    dead. After a heartbeat or start-to-close timeout the previous attempt may still be
+    scraping, so only tasks claimed longer ago than it could run are taken over.
+    """
+    info = activity.info()
+    if info.attempt == 1:
+        return None
+    timeout = info.start_to_close_timeout
+    return max(settings.task_claim_stale_sec, timeout.total_seconds() if timeout else 0)
+
+
 @activity.defn(name="run_scraper")
 async def run_scraper(task_id: int) -> None:
     try:
-        await executor.process_tasks([task_id], on_heartbeat=lambda: activity.heartbeat())
+        await executor.process_tasks(
+            [task_id],
+            on_heartbeat=lambda: activity.heartbeat(),
+            reclaim_after_sec=reclaim_after_sec(),
+        )
     except Exception as e:
         activity.heartbeat()
         if isinstance(e, BotDetectedException):
@@ -32,6 +50,21 @@ async def run_scraper(task_id: int) -> None:
         raise e
 
 
+@activity.defn(name="run_scraper_batch")
+async def run_scraper_batch(task_ids: list[int], concurrency: int) -> list[tuple[int, str | None]]:
+    """Claim and scrape a group of tasks, returning the error (None on success) of each task."""
+    outcomes = await executor.process_tasks(
+        task_ids,
+        on_heartbeat=lambda: activity.heartbeat(),
+        concurrency=concurrency,
+        reclaim_after_sec=reclaim_after_sec(),
+    )
+    return [
+        (task_id, outcomes[task_id] if task_id in outcomes else "Task not found or not pending")
+        for task_id in task_ids
+    ]
+
+
 @activity.defn(name="mark_tasks_as_failed")
 async def mark_tasks_as_failed(failed_tasks: list[tuple[int, str]]) -> None:
     if not failed_tasks:
@@ -42,4 +75,4 @@ async def mark_tasks_as_failed(failed_tasks: list[tuple[int, str]]) -> None:
     print(f"Set tasks as failed: {failed_tasks}")
 
 
-scraper_activities = [run_scraper, mark_tasks_as_failed]
+scraper_activities = [run_scraper, run_scraper_batch, mark_tasks_as_failed]
@@ -1,7 +1,9 @@
 import uvicorn
 
+from .db_setup import create_database
 from .fastapi_app import app as fastapi_app
 
 
 def run_server() -> None:
+    create_database()
     uvicorn.run(fastapi_app, host="0.0.0.0", port=8000, log_level="info")
@@ -1,5 +1,21 @@
+from .blocking import BLOCKING_PROFILES, BlockingProfile, blocking_stats
 from .camoufox_browser import ProxyAuth, get_camoufox_session
-from .cdp_browser import get_cdp_session
+from .cdp_browser import cdp_connections, get_cdp_session
+from .cdp_connections import CDPConnectionManager
 from .get_session import get_session
+from .pool import BrowserPool, browser_pool
 
-__all__ = ["get_camoufox_session", "get_cdp_session", "ProxyAuth", "SessionConfig", "get_session"]
+__all__ = [
+    "BLOCKING_PROFILES",
+    "BlockingProfile",
+    "blocking_stats",
+    "get_camoufox_session",
+    "get_cdp_session",
+    "CDPConnectionManager",
+    "cdp_connections",
+    "ProxyAuth",
+    "SessionConfig",
+    "get_session",
+    "BrowserPool",
+    "browser_pool",
+]
@@ -0,0 +1,235 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from ..scrape_helpers import domain_blocking_profiles
+
+# Ad, analytics and tracking hosts, a blocked host also blocks its subdomains
+TRACKER_DOMAINS = frozenset(
+    {
+        "doubleclick.net",
+        "googlesyndication.com",
+        "googleadservices.com",
+        "googletagmanager.com",
+        "googletagservices.com",
+        "google-analytics.com",
+        "adservice.google.com",
+        "amazon-adsystem.com",
+        "adnxs.com",
+        "criteo.com",
+        "criteo.net",
+        "taboola.com",
+        "outbrain.com",
+        "pubmatic.com",
+        "rubiconproject.com",
+        "casalemedia.com",
+        "openx.net",
+        "moatads.com",
+        "scorecardresearch.com",
+        "quantserve.com",
+        "chartbeat.com",
+        "chartbeat.net",
+        "hotjar.com",
+        "clarity.ms",
+        "segment.io",
+        "cdn.segment.com",
+        "mixpanel.com",
+        "optimizely.com",
+        "nr-data.net",
+        "js-agent.newrelic.com",
+        "connect.facebook.net",
+        "bat.bing.com",
+        "ads.linkedin.com",
+        "snap.licdn.com",
+    }
+)
+
+TRACKER_URL_PATTERNS = (
+    re.compile(r"/(gtag/js|gtm\.js|analytics\.js|ga\.js|fbevents\.js)(\?|$)"),
+    re.compile(r"/(pixel|beacon|tracking-pixel)(\.gif|\.png)?(\?|/|$)"),
+    re.compile(r"[?&]utm_[a-z]+=.*\.(gif|png)$"),
+)
+
+# Rough transfer sizes used to estimate the bytes saved by blocking a request
+ESTIMATED_BYTES = {
+    "image": 30_000,
+    "media": 200_000,
+    "font": 40_000,
+    "stylesheet": 20_000,
+    "script": 30_000,
+}
+DEFAULT_ESTIMATED_BYTES = 2_000
+
+
+@dataclass(frozen=True)
+class BlockingProfile:
+    """
+    What to block while rendering a page: resource types, request hosts (and their
+    subdomains), URL patterns and, with `third_party_scripts`, scripts from other hosts
+    than the page's one.
+    """
+
+    name: str
+    resource_types: frozenset[str] = frozenset()
+    domains: frozenset[str] = frozenset()
+    url_patterns: tuple[re.Pattern, ...] = ()
+    third_party_scripts: bool = False
+
+    @property
+    def blocks_anything(self) -> bool:
+        return bool(
+            self.resource_types or self.domains or self.url_patterns or self.third_party_scripts
+        )
+
+    def block_reason(self, url: str, resource_type: str, page_host: str | None) -> str | None:
+        """Why a request should be blocked, or None if it should go through."""
+        if resource_type == "document":
+            return None
+        host = (urlparse(url).hostname or "").lower()
+        if self.domains:
+            labels = host.split(".")
+            if any(".".join(labels[i:]) in self.domains for i in range(len(labels) - 1)):
+                return "domain"
+        if any(pattern.search(url) for pattern in self.url_patterns):
+            return "pattern"
+        if resource_type in self.resource_types:
+            return resource_type
+        if self.third_party_scripts and resource_type == "script" and page_host:
+            if host != page_host:
+                return "third-party script"
+        return None
+
+
+_TEXT_RESOURCE_TYPES = frozenset(
+    {"image", "media", "font", "stylesheet", "texttrack", "manifest", "ping", "beacon"}
+)
+
+BLOCKING_PROFILES: dict[str, BlockingProfile] = {
+    profile.name: profile
+    for profile in (
+        BlockingProfile("off"),
+        BlockingProfile("images", resource_types=frozenset({"image", "media"})),
+        # Everything that isn't needed to get the text of a page
+        BlockingProfile(
+            "text",
+            resource_types=_TEXT_RESOURCE_TYPES,
+            domains=TRACKER_DOMAINS,
+            url_patterns=TRACKER_URL_PATTERNS,
+        ),
+        BlockingProfile(
+            "strict",
+            resource_types=_TEXT_RESOURCE_TYPES,
+            domains=TRACKER_DOMAINS,
+            url_patterns=TRACKER_URL_PATTERNS,
+            third_party_scripts=True,
+        ),
+    )
+}
+
+
+def get_blocking_profile(name: str) -> BlockingProfile:
+    try:
+        return BLOCKING_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown blocking profile '{name}'") from None
+
+
+def blocking_profile_for(url: str, default: str) -> BlockingProfile:
+    """
+    The profile configured in `domain_blocking_profiles` for the URL's host or a parent
+    domain, or the `default` one.
+    """
+    labels = (urlparse(url).hostname or "").lower().removeprefix("www.").split(".")
+    for i in range(len(labels)):
+        name = domain_blocking_profiles.get(".".join(labels[i:]))
+        if name is not None:
+            return get_blocking_profile(name)
+    return get_blocking_profile(default)
+
+
+@dataclass
+class BlockingStats:
+    allowed: int = 0
+    blocked: int = 0
+    estimated_bytes_saved: int = 0
+    blocked_by_reason: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, reason: str | None, resource_type: str) -> None:
+        with self._lock:
+            if reason is None:
+                self.allowed += 1
+                return
+            self.blocked += 1
+            self.estimated_bytes_saved += ESTIMATED_BYTES.get(
+                resource_type, DEFAULT_ESTIMATED_BYTES
+            )
+            self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + 1
+
+    def summary(self) -> str:
+        with self._lock:
+            reasons = ", ".join(f"{k}: {v}" for k, v in sorted(self.blocked_by_reason.items()))
+            return (
+                f"blocked {self.blocked}/{self.blocked + self.allowed} requests "
+                f"(~{self.estimated_bytes_saved // 1024} KB saved)"
+                f"{f'; {reasons}' if reasons else ''}"
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self.allowed = self.blocked = self.estimated_bytes_saved = 0
+            self.blocked_by_reason = {}
+
+
+# Totals of all browser sessions in the process
+blocking_stats = BlockingStats()
+
+
+class RequestBlocker:
+    """
+    Route handler that applies a blocking profile to every request of a browser context.
+    `navigate()` picks the profile for the page's domain before each navigation.
+
+    Playwright turns the browser's HTTP cache off while requests are routed, which also
+    cancels Camoufox's `enable_cache`, and the resource type of a request is only known
+    once it's routed. So every request is routed while the page's profile blocks
+    something, and none with the "off" profile, which keeps the cache for its domains.
+    """
+
+    def __init__(self, default_profile: str) -> None:
+        self.default_profile = default_profile
+        self.profile = get_blocking_profile(default_profile)
+        self.page_host: str | None = None
+        # Stats of the current page, reset on navigation
+        self.stats = BlockingStats()
+        self._context = None
+        self._routed = False
+
+    def install(self, context) -> None:
+        self._context = context
+        self._update_routing()
+
+    def navigate(self, url: str) -> None:
+        self.profile = blocking_profile_for(url, self.default_profile)
+        self.page_host = (urlparse(url).hostname or "").lower()
+        self.stats.reset()
+        self._update_routing()
+
+    def _update_routing(self) -> None:
+        if self._context is None or self.profile.blocks_anything == self._routed:
+            return
+        if self._routed:
+            self._context.unroute("**/*", self.handle)
+        else:
+            self._context.route("**/*", self.handle)
+        self._routed = not self._routed
+
+    async def handle(self, route, request) -> None:
+        resource_type = request.resource_type
+        reason = self.profile.block_reason(request.url, resource_type, self.page_host)
+        self.stats.record(reason, resource_type)
+        blocking_stats.record(reason, resource_type)
+        if reason is not None:
+            return await route.abort()
+        return await route.continue_()
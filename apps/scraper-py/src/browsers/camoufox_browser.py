@@ -5,18 +5,34 @@ import hrequests
 from hrequests import BrowserEngine, BrowserSession
 from hrequests.proxies import evomi
 
+from ..settings import settings
+from .blocking import RequestBlocker
+from .readiness import ReadyResult, wait_until_ready
+
 _browser_engine = BrowserEngine()
 
 
 class CamoufoxSession(BrowserSession):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, blocking_profile: str | None = None, **kwargs):
+        self.blocker = RequestBlocker(blocking_profile or settings.browser_blocking_profile)
         super().__init__(*args, **kwargs)
+        self.blocker.install(self.context)
 
     def goto(self, url, *, timeout: float = 180_000, wait_until: str = "domcontentloaded"):
+        self.blocker.navigate(url)
         resp = self.page.goto(url, timeout=timeout, wait_until=wait_until)
         self.status_code = resp.status
         return resp
 
+    def awaitReady(self, *, timeout: float | None = None) -> ReadyResult:
+        """
+        Wait until the page content is stable, see `readiness.wait_until_ready`
+
+        Parameters:
+            timeout (float, optional): Timeout in seconds. Defaults to settings.ready_timeout.
+        """
+        return wait_until_ready(self.page, self.url, timeout=timeout)
+
 
 class ProxyAuth(TypedDict):
     username: str
@@ -42,5 +58,4 @@ def get_camoufox_session(*, proxy_auth: ProxyAuth | None = None) -> BrowserSessi
         humanize=True,
         locale=["en-US"],
         enable_cache=True,
-        block_images=True,
     )
@@ -1,17 +1,26 @@
+import atexit
+
 import hrequests
 from hrequests import BrowserEngine
 
+from ..settings import settings
+from .cdp_connections import CDPConnectionManager
 from .cdp_session import CDPSession
 
 _browser_engine = BrowserEngine(browser_type="chrome")
 
+# One connection per CDP endpoint for the whole process, sessions get their own context on it
+cdp_connections = CDPConnectionManager(_browser_engine, max_contexts=settings.cdp_max_contexts)
+
+atexit.register(cdp_connections.close)
+
 
 def get_cdp_session(*, endpoint_url: str) -> CDPSession:
     session = hrequests.chrome.Session(
         timeout=30,
     )
     return CDPSession(
-        engine=_browser_engine,
+        connections=cdp_connections,
         session=session,
         endpoint_url=endpoint_url,
     )
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+from hrequests import BrowserEngine
+from playwright.async_api import Browser, BrowserContext
+
+
+class CDPConnectionManager:
+    """
+    Keeps one CDP connection per endpoint URL open in `engine` and hands out isolated
+    browser contexts on it, so that a CDP session doesn't pay for a new connection.
+
+    At most `max_contexts` contexts are open at a time, `acquire_slot()` blocks until one
+    is available. A connection that was dropped is reopened when the next context is
+    created, and a context creation that fails on a dead connection is retried once
+    on a new connection.
+    """
+
+    def __init__(
+        self, engine: BrowserEngine, *, max_contexts: int, acquire_timeout: float = 120
+    ) -> None:
+        self.engine = engine
+        self.max_contexts = max(max_contexts, 1)
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(self.max_contexts)
+        # Only used in the engine's event loop
+        self._browsers: dict[str, Browser] = {}
+        self._connect_locks: dict[str, asyncio.Lock] = {}
+
+    def acquire_slot(self) -> None:
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"No CDP context available after {self.acquire_timeout}s")
+
+    def release_slot(self) -> None:
+        self._slots.release()
+
+    async def new_context(self, endpoint_url: str, **connect_options) -> BrowserContext:
+        """Open a context on the connection to `endpoint_url`, runs in the engine's loop."""
+        for attempt in range(2):
+            browser = await self._get_browser(endpoint_url, **connect_options)
+            try:
+                return await browser.new_context()
+            except Exception:
+                if attempt or browser.is_connected():
+                    raise
+                print(f"CDP connection to {endpoint_url} was lost, reconnecting")
+                self._forget(endpoint_url, browser)
+        raise AssertionError("unreachable")
+
+    async def _get_browser(self, endpoint_url: str, **connect_options) -> Browser:
+        lock = self._connect_locks.setdefault(endpoint_url, asyncio.Lock())
+        async with lock:
+            browser = self._browsers.get(endpoint_url)
+            if browser is not None and browser.is_connected():
+                return browser
+            try:
+                browser = await self.engine.playwright.chromium.connect_over_cdp(
+                    endpoint_url=endpoint_url, **connect_options
+                )
+            except TypeError as exc:
+                raise TypeError("Unsupported parameters passed to CDP browser.") from exc
+            browser.on("disconnected", lambda b: self._forget(endpoint_url, b))
+            self._browsers[endpoint_url] = browser
+            return browser
+
+    def _forget(self, endpoint_url: str, browser: Browser) -> None:
+        if self._browsers.get(endpoint_url) is browser:
+            del self._browsers[endpoint_url]
+
+    def close(self) -> None:
+        """Disconnect from all endpoints, the remote browsers keep running."""
+
+        async def disconnect() -> None:
+            browsers = list(self._browsers.values())
+            self._browsers.clear()
+            for browser in browsers:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    print(f"Failed to close CDP connection: {e}")
+
+        self.engine.execute(disconnect)
@@ -2,7 +2,6 @@ import asyncio
 from collections.abc import Callable
 from http.client import responses as status_codes
 from typing import Optional
-from urllib.parse import urlparse
 
 import hrequests
 from hrequests.browser.browser import ERROR, BrowserEngine, BrowserObjectWrapper
@@ -12,31 +11,43 @@ from hrequests.cookies import RequestsCookieJar, cookiejar_to_list, list_to_cook
 from hrequests.exceptions import JavascriptException
 from playwright.async_api import BrowserContext
 
+from ..settings import settings
+from .blocking import RequestBlocker
+from .cdp_connections import CDPConnectionManager
+from .readiness import ReadyResult, wait_until_ready
+
 
 class ChromeBrowserClient(AbstractBrowserClient):
-    async def _start_context(self, **launch_args) -> BrowserContext:
+    async def _start_context(
+        self, *, connections: CDPConnectionManager, **launch_args
+    ) -> BrowserContext:
         """
-        Create a new CDP browser context
+        Create a new browser context on the shared CDP connection
         """
-        try:
-            cmd = self.engine.playwright.chromium.connect_over_cdp(**launch_args)
-        except TypeError as exc:
-            raise TypeError("Unsupported parameters passed to CDP browser.") from exc
-        browser = await cmd
-
-        # Add pointer to the objects list to delete on shutdown
-        self.main_browser = browser
+        return await connections.new_context(**launch_args)
 
-        return await browser.new_context()
+    def stop(self):
+        """
+        Close the context, the CDP connection is shared with other sessions
+        """
+        self.context.close()
 
 
 class CDPSession:
     """
     Args:
-        session (hrequests.session.TLSSession, optional): Session to use for headers, cookies, etc.
-        resp (hrequests.response.Response, optional): Response to update with cookies, headers, etc.
-        engine (BrowserEngine, optional): Pass in an existing BrowserEngine instead of creating a new one.
-        **kwargs: Additional arguments to pass to connect_over_cdp.
+        session (hrequests.session.TLSSession, optional): Session to use for headers,
+            cookies, etc.
+        resp (hrequests.response.Response, optional): Response to update with cookies,
+            headers, etc.
+        connections (CDPConnectionManager, optional): Open the browser context on a shared
+            CDP connection.
+        engine (BrowserEngine, optional): Pass in an existing BrowserEngine instead of
+            creating a new one. Ignored when `connections` is passed.
+        blocking_profile (str, optional): Default resource blocking profile,
+            see `blocking.BLOCKING_PROFILES`.
+        **kwargs: Additional arguments to pass to connect_over_cdp when connecting
+            to `endpoint_url`.
 
     Attributes:
         url (str): Get the page url
@@ -49,8 +60,10 @@ class CDPSession:
     Navigation Methods:
         goto(url): Navigate to a URL.
         awaitSelector(selector, arg): Wait for a selector to exist
+        awaitReady(timeout): Wait until the page content is stable
         evaluate(script, arg): Evaluate and return a script
-        setHeaders(headers): Set the browser headers. Note that this will NOT update the TLSSession headers
+        setHeaders(headers): Set the browser headers. Note that this will NOT update
+            the TLSSession headers
         close(): Close the instance
     """
 
@@ -60,7 +73,9 @@ class CDPSession:
         session: hrequests.session.TLSSession | None = None,
         resp: hrequests.response.Response | None = None,
         endpoint_url: str,
+        connections: CDPConnectionManager | None = None,
         engine: Optional["BrowserEngine"] = None,
+        blocking_profile: str | None = None,
         **launch_options,
     ) -> None:
         # Remember session and resp to clone cookies back to when closing
@@ -68,17 +83,22 @@ class CDPSession:
         self.resp: hrequests.response.Response | None = resp
 
         # Set the engine, or create one if not provided
-        if engine:
+        if connections:
+            self.engine = connections.engine
+            self.temp_engine = False
+        elif engine:
             self.engine = engine
             self.temp_engine = False
         else:
             self.engine = BrowserEngine(browser_type="chrome")
             self.temp_engine = True
+        # Use the shared connections, or connect just for this session
+        self.temp_connections = connections is None
+        self.connections = connections or CDPConnectionManager(self.engine, max_contexts=1)
 
         self._headers: dict | None = None
         self.context: BrowserObjectWrapper | None = None
-        self._allowed_script_host: str | None = None
-        self._routes_installed: bool = False
+        self.blocker = RequestBlocker(blocking_profile or settings.cdp_blocking_profile)
 
         # Browser config
         self.status_code: int | None
@@ -98,24 +118,35 @@ class CDPSession:
         self.start()
 
     def start(self) -> None:
-        asyncio.run(self.__start())
+        self.connections.acquire_slot()
+        try:
+            asyncio.run(self.__start())
+        except BaseException:
+            self.connections.release_slot()
+            raise
 
     async def __start(self) -> None:
         # Build the playwright instance
         self.client = await ChromeBrowserClient(
             engine=self.engine,
+            connections=self.connections,
             **self.launch_options,
         )
         # Save the context
         self.context = self.client.context
-        self._install_blocking_routes()
+        self.blocker.install(self.context)
         # Create a new page
         self.page = self.client.new_page()
 
     def shutdown(self) -> None:
         self._closed = True
-        self.client.stop()
+        try:
+            self.client.stop()
+        finally:
+            self.connections.release_slot()
 
+        if self.temp_connections:
+            self.connections.close()
         if self.temp_engine:
             self.engine.stop()
 
@@ -131,7 +162,7 @@ class CDPSession:
 
     def goto(self, url, timeout: float = 180_000, wait_until: str = "domcontentloaded"):
         """Navigate to a URL"""
-        self._allowed_script_host = urlparse(url).hostname or ""
+        self.blocker.navigate(url)
         resp = self.page.goto(url, timeout=timeout, wait_until=wait_until)
         self.status_code = resp.status
         return resp
@@ -150,6 +181,15 @@ class CDPSession:
             timeout=int(timeout * 1e3),
         )
 
+    def awaitReady(self, *, timeout: float | None = None) -> ReadyResult:
+        """
+        Wait until the page content is stable, see `readiness.wait_until_ready`
+
+        Parameters:
+            timeout (float, optional): Timeout in seconds. Defaults to settings.ready_timeout.
+        """
+        return wait_until_ready(self.page, self.url, timeout=timeout)
+
     def getContent(self):
         """Get the page content"""
         return self.page.content()
@@ -277,40 +317,24 @@ class CDPSession:
         # Context never started #66
         if self.context is None:
             raise RuntimeError("Browser context was not initialized")
-        cookiejar = self.getCookies()
-        # Update session if provided
-        if self.session:
-            self.session.cookies = cookiejar
-        # Update response
-        if self.resp is not None:
-            self.resp.cookies = cookiejar
-            self.resp.raw = self.page.content()
-            self.resp.url = self.page.url
-            self.resp.status_code = self.status_code
-        # Close browser
-        self.shutdown()
+        try:
+            cookiejar = self.getCookies()
+            # Update session if provided
+            if self.session:
+                self.session.cookies = cookiejar
+            # Update response
+            if self.resp is not None:
+                self.resp.cookies = cookiejar
+                self.resp.raw = self.page.content()
+                self.resp.url = self.page.url
+                self.resp.status_code = self.status_code
+        finally:
+            # Close browser, even if the connection is gone, to free the context slot
+            self.shutdown()
 
     def __del__(self):
         self.close()
 
-    def _install_blocking_routes(self) -> None:
-        if self._routes_installed:
-            return
-
-        async def _global_block_handler(route, request):
-            rtype = request.resource_type
-            if rtype in ("image", "media"):
-                return await route.abort()
-            if rtype == "script" and self._allowed_script_host:
-                req_host = urlparse(request.url).hostname or ""
-                allowed_host = self._allowed_script_host
-                if req_host != allowed_host:
-                    return await route.abort()
-            return await route.continue_()
-
-        self.context.route("**/*", _global_block_handler)
-        self._routes_installed = True
-
 
 def render(
     url: str | None = None,
@@ -0,0 +1,207 @@
+import atexit
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import monotonic
+
+from hrequests import BrowserSession
+
+from ..settings import settings
+from .get_session import get_session
+
+PoolKey = tuple[bool, bool]
+
+
+@dataclass
+class PooledSession:
+    key: PoolKey
+    session: BrowserSession
+    pages: int = 0
+    created_at: float = field(default_factory=monotonic)
+    last_used_at: float = field(default_factory=monotonic)
+
+
+class BrowserPool:
+    """
+    Process-wide pool of pre-launched browser sessions keyed by (use_proxy, use_cdp).
+
+    Sessions are leased with `lease()` and returned to the pool when the block exits
+    normally. A session that raised inside the block is considered tainted (e.g. bot
+    detected or the browser crashed) and is closed instead of being reused.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[bool, bool], BrowserSession],
+        *,
+        min_size: int,
+        max_size: int,
+        idle_timeout: float,
+        max_pages: int,
+        lease_timeout: float = 120,
+    ) -> None:
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.max_pages = max_pages
+        self.lease_timeout = lease_timeout
+
+        self._cond = threading.Condition()
+        self._idle: dict[PoolKey, list[PooledSession]] = defaultdict(list)
+        # Number of sessions alive (idle + leased + being launched)
+        self._total = 0
+        self._closed = False
+
+    @contextmanager
+    def lease(self, *, use_proxy: bool = False, use_cdp: bool = False) -> Iterator[BrowserSession]:
+        pooled = self._acquire((use_proxy, use_cdp))
+        try:
+            yield pooled.session
+        except BaseException:
+            self._discard(pooled)
+            raise
+        else:
+            self._release(pooled)
+
+    def warm(self, *, use_proxy: bool = False, use_cdp: bool = False) -> None:
+        """Launch sessions until `min_size` of them are idle for the given key."""
+        key = (use_proxy, use_cdp)
+        while True:
+            with self._cond:
+                if (
+                    self._closed
+                    or len(self._idle[key]) >= self.min_size
+                    or self._total >= self.max_size
+                ):
+                    return
+                self._total += 1
+            pooled = self._launch(key)
+            with self._cond:
+                self._idle[key].append(pooled)
+                self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = [pooled for sessions in self._idle.values() for pooled in sessions]
+            self._idle.clear()
+            self._cond.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def _acquire(self, key: PoolKey) -> PooledSession:
+        deadline = monotonic() + self.lease_timeout
+        while True:
+            pooled: PooledSession | None = None
+            swapped = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                to_close = self._evict_idle_locked()
+                if self._idle[key]:
+                    # LIFO, the most recently used session is the warmest one
+                    pooled = self._idle[key].pop()
+                elif self._total < self.max_size:
+                    self._total += 1
+                elif victim := self._oldest_idle_locked():
+                    # Pool is full with idle sessions of another kind, swap one out
+                    to_close.append(victim)
+                    swapped = True
+                else:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"No browser session available after {self.lease_timeout}s"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            for stale in to_close:
+                self._discard(stale)
+
+            if swapped:
+                continue
+            if pooled is None:
+                return self._launch(key)
+            if self._is_healthy(pooled):
+                return pooled
+            self._discard(pooled)
+
+    def _release(self, pooled: PooledSession) -> None:
+        pooled.pages += 1
+        pooled.last_used_at = monotonic()
+        if self._closed or pooled.pages >= self.max_pages or not self._reset(pooled):
+            self._discard(pooled)
+            return
+        with self._cond:
+            self._idle[pooled.key].append(pooled)
+            self._cond.notify()
+
+    def _discard(self, pooled: PooledSession) -> None:
+        try:
+            pooled.session.close()
+        except Exception as e:
+            print(f"Failed to close browser session: {e}")
+        finally:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+
+    def _launch(self, key: PoolKey) -> PooledSession:
+        use_proxy, use_cdp = key
+        try:
+            return PooledSession(key=key, session=self._factory(use_proxy, use_cdp))
+        except BaseException:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _evict_idle_locked(self) -> list[PooledSession]:
+        now = monotonic()
+        evicted: list[PooledSession] = []
+        for sessions in self._idle.values():
+            # Oldest sessions sit at the front of the list
+            while len(sessions) > self.min_size and (
+                now - sessions[0].last_used_at > self.idle_timeout
+            ):
+                evicted.append(sessions.pop(0))
+        return evicted
+
+    def _oldest_idle_locked(self) -> PooledSession | None:
+        candidates = [sessions[0] for sessions in self._idle.values() if sessions]
+        if not candidates:
+            return None
+        victim = min(candidates, key=lambda pooled: pooled.last_used_at)
+        self._idle[victim.key].remove(victim)
+        return victim
+
+    @staticmethod
+    def _is_healthy(pooled: PooledSession) -> bool:
+        try:
+            return pooled.session.evaluate("1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(pooled: PooledSession) -> bool:
+        try:
+            # Unload the page so that its scripts stop running while the session is idle
+            pooled.session.page.goto("about:blank")
+            return True
+        except Exception:
+            return False
+
+
+browser_pool = BrowserPool(
+    get_session,
+    min_size=settings.browser_pool_min_size,
+    max_size=settings.browser_pool_max_size,
+    idle_timeout=settings.browser_pool_idle_timeout,
+    max_pages=settings.browser_pool_max_pages,
+)
+
+atexit.register(browser_pool.close)
@@ -0,0 +1,156 @@
+import threading
+from contextlib import suppress
+from dataclasses import dataclass, field
+from time import monotonic
+from urllib.parse import urlparse
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from ..scrape_helpers import domain_readiness_rules
+from ..settings import settings
+
+# Resolves once the DOM had no mutations for `quietMs` and the body has some text,
+# or after `timeoutMs`
+QUIESCENCE_SCRIPT = """
+({ quietMs, timeoutMs, minTextLength }) => new Promise((resolve) => {
+  const start = performance.now();
+  let lastMutation = start;
+  const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+  observer.observe(document, { subtree: true, childList: true, characterData: true });
+  const check = () => {
+    const now = performance.now();
+    const textLength = document.body ? document.body.textContent.length : 0;
+    const reason = now - lastMutation >= quietMs && textLength >= minTextLength
+      ? "quiet"
+      : now - start >= timeoutMs ? "timeout" : null;
+    if (reason) {
+      observer.disconnect();
+      resolve(reason);
+    } else {
+      setTimeout(check, 50);
+    }
+  };
+  check();
+})
+"""
+
+
+@dataclass(frozen=True)
+class ReadinessRule:
+    """
+    How to tell that a page is ready: an optional selector to wait for, an optional
+    network idle wait capped at `network_idle_ms`, then DOM quiescence for `quiet_ms`.
+    """
+
+    selector: str | None = None
+    network_idle_ms: int | None = None
+    quiet_ms: int | None = None
+
+
+def _domain(url: str) -> str:
+    return (urlparse(url).hostname or "").lower().removeprefix("www.")
+
+
+def readiness_rule_for(url: str) -> ReadinessRule:
+    labels = _domain(url).split(".")
+    for i in range(len(labels)):
+        rule = domain_readiness_rules.get(".".join(labels[i:]))
+        if rule is not None:
+            return ReadinessRule(**rule)
+    return ReadinessRule()
+
+
+@dataclass
+class ReadinessStats:
+    """Time to ready by domain, and how often each wait ended for a given reason."""
+
+    count: dict[str, int] = field(default_factory=dict)
+    total_ms: dict[str, float] = field(default_factory=dict)
+    max_ms: dict[str, float] = field(default_factory=dict)
+    reasons: dict[str, dict[str, int]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, domain: str, elapsed_ms: float, reason: str) -> None:
+        with self._lock:
+            self.count[domain] = self.count.get(domain, 0) + 1
+            self.total_ms[domain] = self.total_ms.get(domain, 0) + elapsed_ms
+            self.max_ms[domain] = max(self.max_ms.get(domain, 0), elapsed_ms)
+            reasons = self.reasons.setdefault(domain, {})
+            reasons[reason] = reasons.get(reason, 0) + 1
+
+    def summary(self, domain: str) -> str:
+        with self._lock:
+            count = self.count.get(domain, 0)
+            if not count:
+                return f"{domain}: no pages"
+            return (
+                f"{domain}: {count} pages, avg {self.total_ms[domain] / count:.0f} ms, "
+                f"max {self.max_ms[domain]:.0f} ms, {self.reasons[domain]}"
+            )
+
+
+readiness_stats = ReadinessStats()
+
+
+@dataclass
+class ReadyResult:
+    reason: str
+    elapsed_ms: float
+
+
+def wait_until_ready(page, url: str, *, timeout: float | None = None) -> ReadyResult:
+    """
+    Wait until the page loaded from `url` is ready to be read, as set up by its domain's
+    rule, for at most `timeout` seconds. Never raises on a timeout, the result tells why
+    the wait ended.
+    """
+    rule = readiness_rule_for(url)
+    start = monotonic()
+    deadline = start + (settings.ready_timeout if timeout is None else timeout)
+
+    def remaining_ms() -> int:
+        # Playwright treats a timeout of 0 as no timeout, callers skip the wait instead
+        return int((deadline - monotonic()) * 1e3)
+
+    reason = "quiet"
+    if rule.selector:
+        selector_ms = remaining_ms()
+        reason = "selector timeout"
+        if selector_ms > 0:
+            with suppress(PlaywrightTimeoutError):
+                page.wait_for_selector(rule.selector, state="attached", timeout=selector_ms)
+                reason = "quiet"
+
+    network_idle_ms = (
+        settings.ready_network_idle_ms if rule.network_idle_ms is None else rule.network_idle_ms
+    )
+    network_idle_ms = min(network_idle_ms or 0, remaining_ms())
+    if network_idle_ms > 0:
+        # long-polling and analytics keep some pages busy forever, the wait is only a cap
+        with suppress(PlaywrightTimeoutError):
+            page.wait_for_load_state("networkidle", timeout=network_idle_ms)
+
+    # A navigation done by the page's scripts destroys the observer, observe the new page
+    quiescence = "timeout"
+    for _ in range(2):
+        quiescence_ms = remaining_ms()
+        if quiescence_ms <= 0:
+            break
+        try:
+            quiescence = page.evaluate(
+                QUIESCENCE_SCRIPT,
+                {
+                    "quietMs": rule.quiet_ms or settings.ready_quiet_ms,
+                    "timeoutMs": quiescence_ms,
+                    "minTextLength": settings.ready_min_text_length,
+                },
+            )
+            break
+        except Exception:
+            quiescence = "navigated"
+    if reason == "quiet":
+        reason = quiescence
+
+    elapsed_ms = (monotonic() - start) * 1e3
+    readiness_stats.record(_domain(url), elapsed_ms, reason)
+    return ReadyResult(reason=reason, elapsed_ms=elapsed_ms)
@@ -1,6 +1,7 @@
 import asyncio
 
 from .celery_worker import celery_app
+from .settings import settings
 from .task_executor import TaskExecutor
 
 
@@ -24,4 +25,7 @@ executor = TaskExecutor()
 @celery_app.task(name="tasks.execute_task")
 def execute_task(task_id: int):
     loop = get_or_create_event_loop()
-    return loop.run_until_complete(executor.process_tasks([task_id]))
+    # A redelivered message (acks_late) only reruns the task if its first run looks dead
+    return loop.run_until_complete(
+        executor.process_tasks([task_id], reclaim_after_sec=settings.task_claim_stale_sec)
+    )
@@ -1,6 +1,8 @@
 
 from celery import Celery
+from celery.signals import worker_init
 
+from .db_setup import create_database
 from .settings import settings
 
 celery_app = Celery(
@@ -22,3 +24,9 @@ celery_app.conf.update(
     redis_backend_health_check_interval=60,
     worker_prefetch_multiplier=1,
 )
+
+
+@worker_init.connect
+def setup_database(**kwargs):
+    # Runs once in the main worker process, before the pool's processes start
+    create_database()
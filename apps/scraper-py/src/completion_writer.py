@@ -0,0 +1,113 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class _Completion:
+    task_id: int
+    payload: Any
+    is_success: bool
+    future: asyncio.Future
+
+
+class CompletionWriter:
+    """
+    Write-behind buffer for task completions shared by all concurrent `run_task` calls.
+
+    Completions are flushed as one multi-row update per kind once `max_batch` of them
+    are buffered, `flush_interval_ms` passed since the first one, or every running
+    task has reported. `success()` and `failure()` return only after the completion
+    is committed, so a task (and the activity running it) never finishes before its
+    result is written, and write errors surface to the caller. A batch that fails to
+    write is split in halves and retried, so only the completions that can't be written
+    get the error.
+    """
+
+    def __init__(
+        self,
+        *,
+        write_successes: Callable[[list[int], list[Any]], Awaitable[None]],
+        write_failures: Callable[[list[int], list[str]], Awaitable[None]],
+        flush_interval_ms: int,
+        max_batch: int,
+    ) -> None:
+        self._write_successes = write_successes
+        self._write_failures = write_failures
+        self.flush_interval_ms = flush_interval_ms
+        self.max_batch = max(max_batch, 1)
+
+        self._pending: list[_Completion] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+        self._running: set[int] = set()
+
+    def task_started(self, task_id: int) -> None:
+        self._running.add(task_id)
+
+    async def success(self, task_id: int, result: Any) -> None:
+        await self._add(task_id, result, is_success=True)
+
+    async def failure(self, task_id: int, exception_log: str) -> None:
+        await self._add(task_id, exception_log, is_success=False)
+
+    async def _add(self, task_id: int, payload: Any, *, is_success: bool) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_Completion(task_id, payload, is_success, future))
+        # A task that reports again, e.g. a failure after its success couldn't be
+        # written, is no longer running
+        self._running.discard(task_id)
+
+        if len(self._pending) >= self.max_batch or not self._running:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval_ms / 1000, self._start_flush)
+        await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        flush = asyncio.get_running_loop().create_task(self._write(batch))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: list[_Completion]) -> None:
+        # The last completion reported for a task wins
+        latest = {completion.task_id: completion for completion in batch}
+        successes = [c for c in latest.values() if c.is_success]
+        failures = [c for c in latest.values() if not c.is_success]
+
+        success_errors, failure_errors = await asyncio.gather(
+            self._write_split(successes, self._write_successes),
+            self._write_split(failures, self._write_failures),
+        )
+        errors = success_errors | failure_errors
+        for completion in batch:
+            if completion.future.done():
+                continue
+            if error := errors.get(completion.task_id):
+                completion.future.set_exception(error)
+            else:
+                completion.future.set_result(None)
+
+    async def _write_split(
+        self, completions: list[_Completion], writer: Callable
+    ) -> dict[int, BaseException]:
+        """Write the completions and return the error of each task that couldn't be written."""
+        if not completions:
+            return {}
+        try:
+            await writer([c.task_id for c in completions], [c.payload for c in completions])
+        except Exception as e:
+            if len(completions) == 1:
+                return {completions[0].task_id: e}
+            middle = len(completions) // 2
+            first = await self._write_split(completions[:middle], writer)
+            return first | await self._write_split(completions[middle:], writer)
+        return {}
@@ -0,0 +1,352 @@
+import asyncio
+import json
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from time import time
+from typing import Any, Protocol
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .settings import settings
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Task fields that only affect how a page is fetched, not its content
+IGNORED_CONFIG_FIELDS = {"url", "max_retry"}
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl_sec: float) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+
+class NoCacheBackend:
+    """Stores nothing, for when no backend shared by the API and the workers is set up."""
+
+    async def get(self, key: str) -> bytes | None:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl_sec: float) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+
+class DiskCacheBackend:
+    """
+    Stores entries as files in `directory`. A file's mtime is its last access time,
+    so once the total size goes over `max_bytes` the least recently used files are removed.
+    Only suitable when the API and the workers share a filesystem.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl_sec: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl_sec)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, self._path(key))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{sha256(key.encode()).hexdigest()}.cache"
+
+    def _get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        expires_at, _, value = data.partition(b"\n")
+        if float(expires_at) <= time():
+            self._delete(path)
+            return None
+        os.utime(path)
+        return value
+
+    def _set(self, key: str, value: bytes, ttl_sec: float) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        data = f"{time() + ttl_sec}\n".encode() + value
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        with self._lock:
+            total = self._get_total_bytes()
+            if path.exists():
+                total -= path.stat().st_size
+            os.replace(tmp_path, path)
+            self._total_bytes = total + len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _delete(self, path: Path) -> None:
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _get_total_bytes(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self.directory.glob("*.cache"))
+        return self._total_bytes
+
+    def _evict(self) -> None:
+        files = sorted(
+            ((p.stat().st_mtime, p.stat().st_size, p) for p in self.directory.glob("*.cache")),
+            key=lambda item: item[0],
+        )
+        total = sum(size for _, size, _ in files)
+        # Evict down to 90% so that every following write doesn't rescan the directory
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+
+
+# KEYS: sizes hash, total size. Sums the sizes hash into the total if it's missing,
+# e.g. for entries stored before the total was kept.
+_INIT_TOTAL_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+  local total = 0
+  for _, size in ipairs(redis.call('HVALS', KEYS[1])) do total = total + tonumber(size) end
+  redis.call('SET', KEYS[2], total)
+end
+"""
+
+# KEYS: sizes hash, total size. ARGV: key, size. Returns the new total size.
+SET_SIZE_LUA = (
+    _INIT_TOTAL_LUA
+    + """
+local previous = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return redis.call('INCRBY', KEYS[2], tonumber(ARGV[2]) - previous)
+"""
+)
+
+# KEYS: sizes hash, total size, LRU sorted set. ARGV: keys. Returns the new total size.
+FORGET_LUA = (
+    _INIT_TOTAL_LUA
+    + """
+local freed = 0
+for _, key in ipairs(ARGV) do
+  freed = freed + tonumber(redis.call('HGET', KEYS[1], key) or '0')
+  redis.call('HDEL', KEYS[1], key)
+  redis.call('ZREM', KEYS[3], key)
+end
+return redis.call('DECRBY', KEYS[2], freed)
+"""
+)
+
+
+class RedisCacheBackend:
+    """
+    Stores entries as Redis strings with a TTL. A sorted set of keys scored by last access
+    time, a hash of entry sizes and their running total are used to evict the least
+    recently used entries once the total size goes over `max_bytes`.
+    """
+
+    def __init__(self, url: str, max_bytes: int, prefix: str = "content-cache") -> None:
+        self.url = url
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self._lru_key = f"{prefix}:lru"
+        self._sizes_key = f"{prefix}:sizes"
+        self._total_key = f"{prefix}:total"
+        # redis.asyncio connections are bound to the event loop they were opened in
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        import redis.asyncio as redis
+
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients[loop] = redis.Redis.from_url(self.url)
+        return self._clients[loop]
+
+    def _data_key(self, key: str) -> str:
+        return f"{self.prefix}:data:{key}"
+
+    async def get(self, key: str) -> bytes | None:
+        client = self._client()
+        value = await client.get(self._data_key(key))
+        if value is None:
+            await self._forget(client, [key])
+            return None
+        await client.zadd(self._lru_key, {key: time()}, xx=True)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_sec: float) -> None:
+        client = self._client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.set(self._data_key(key), value, px=int(ttl_sec * 1000))
+            pipe.zadd(self._lru_key, {key: time()})
+            pipe.eval(SET_SIZE_LUA, 2, self._sizes_key, self._total_key, key, len(value))
+            *_, total = await pipe.execute()
+        if int(total) > self.max_bytes:
+            await self._evict(client, int(total))
+
+    async def delete(self, key: str) -> None:
+        client = self._client()
+        await client.delete(self._data_key(key))
+        await self._forget(client, [key])
+
+    async def _forget(self, client, keys: list[str]) -> int:
+        total = await client.eval(
+            FORGET_LUA, 3, self._sizes_key, self._total_key, self._lru_key, *keys
+        )
+        return int(total)
+
+    async def _evict(self, client, total: int) -> None:
+        # Evict down to 90% so that every following write doesn't evict again
+        while total > self.max_bytes * 0.9:
+            oldest = await client.zrange(self._lru_key, 0, 49)
+            if not oldest:
+                break
+            oldest_sizes = await client.hmget(self._sizes_key, oldest)
+            evicted = []
+            remaining = total
+            for key, size in zip(oldest, oldest_sizes, strict=True):
+                if remaining <= self.max_bytes * 0.9:
+                    break
+                evicted.append(key.decode())
+                remaining -= int(size or 0)
+            await client.delete(*(self._data_key(k) for k in evicted))
+            total = await self._forget(client, evicted)
+
+
+@dataclass
+class CachedContent:
+    result: Any
+    stored_at: float
+    is_stale: bool
+
+
+class ContentCache:
+    """
+    Cache of scrape results keyed by the normalized task URL and the scraper config.
+
+    Entries are fresh for the TTL of their domain (`domain_ttls`, matched on the host and
+    its parent domains, falling back to `default_ttl_sec`) and then served as stale for
+    `stale_sec` more while they are being revalidated. Backend errors are logged and
+    treated as misses, the cache never fails a request.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        *,
+        default_ttl_sec: float,
+        stale_sec: float,
+        domain_ttls: dict[str, float] | None = None,
+    ) -> None:
+        self.backend = backend
+        self.default_ttl_sec = default_ttl_sec
+        self.stale_sec = stale_sec
+        self.domain_ttls = {
+            domain.lower().removeprefix("www."): ttl for domain, ttl in (domain_ttls or {}).items()
+        }
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{parts.port}"
+        path = parts.path.rstrip("/") or "/"
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit((scheme, host, path, query, ""))
+
+    def make_key(self, scraper_name: str, data: dict) -> str | None:
+        url = data.get("url")
+        if not url:
+            return None
+        config = {k: v for k, v in data.items() if k not in IGNORED_CONFIG_FIELDS}
+        config_hash = sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+        return f"{scraper_name}:{config_hash}:{self.normalize_url(url)}"
+
+    def ttl_for(self, url: str) -> float:
+        host = (urlsplit(url).hostname or "").lower().removeprefix("www.")
+        labels = host.split(".")
+        for i in range(len(labels)):
+            ttl = self.domain_ttls.get(".".join(labels[i:]))
+            if ttl is not None:
+                return ttl
+        return self.default_ttl_sec
+
+    async def get(self, scraper_name: str, data: dict) -> CachedContent | None:
+        key = self.make_key(scraper_name, data)
+        if key is None:
+            return None
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            print(f"Content cache read failed: {e}")
+            return None
+        if value is None:
+            return None
+        entry = json.loads(value)
+        return CachedContent(
+            result=entry["result"],
+            stored_at=entry["stored_at"],
+            is_stale=entry["fresh_until"] <= time(),
+        )
+
+    async def get_many(self, scraper_name: str, items: list[dict]) -> list[CachedContent | None]:
+        return list(await asyncio.gather(*(self.get(scraper_name, data) for data in items)))
+
+    async def set(self, scraper_name: str, data: dict, result: Any) -> None:
+        key = self.make_key(scraper_name, data)
+        if key is None:
+            return
+        ttl_sec = self.ttl_for(data["url"])
+        if ttl_sec <= 0:
+            return
+        now = time()
+        try:
+            value = json.dumps({"result": result, "stored_at": now, "fresh_until": now + ttl_sec})
+            await self.backend.set(key, value.encode(), ttl_sec + self.stale_sec)
+        except Exception as e:
+            print(f"Content cache write failed: {e}")
+
+
+def create_content_cache() -> ContentCache:
+    # Disk only works when the API and the workers share a filesystem, so it has to be chosen
+    backend_name = settings.content_cache_backend or ("redis" if settings.redis_url else "off")
+    if backend_name == "off":
+        backend = NoCacheBackend()
+    elif backend_name == "redis":
+        backend = RedisCacheBackend(settings.redis_url, settings.content_cache_max_bytes)
+    elif backend_name == "disk":
+        backend = DiskCacheBackend(settings.content_cache_dir, settings.content_cache_max_bytes)
+    else:
+        raise ValueError(f"Unknown content cache backend '{backend_name}'")
+    return ContentCache(
+        backend,
+        default_ttl_sec=settings.content_cache_ttl_sec,
+        stale_sec=settings.content_cache_stale_sec,
+        domain_ttls=settings.content_cache_domain_ttls,
+    )
+
+
+content_cache = create_content_cache()
@@ -0,0 +1,98 @@
+import asyncio
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+
+from .settings import settings
+from .utils import ParsedPage, parse_page
+
+
+def _get_mp_context() -> multiprocessing.context.BaseContext:
+    # Forking a process with running browser and Temporal threads is unsafe, so workers
+    # are forked from a clean server process that has only the conversion code imported
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([parse_page.__module__])
+    return context
+
+
+class ConversionExecutor:
+    """
+    Runs HTML-to-markdown conversion in a pool of worker processes, so that concurrent
+    scrapes don't fight over the GIL with each other and with activity heartbeats.
+
+    At most `max_pending` conversions are queued at once; callers block until a slot
+    frees up. HTML larger than `max_html_bytes` once UTF-8 encoded is truncated before
+    being sent over, and the result is marked as `truncated`.
+    Falls back to converting in the calling thread when the pool is disabled
+    (`workers=0`) or when running in a daemon process (e.g. Celery prefork children),
+    which is not allowed to have children of its own.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int, max_html_bytes: int) -> None:
+        self.workers = workers
+        self.max_html_bytes = max_html_bytes
+        self._slots = threading.BoundedSemaphore(max(max_pending, 1))
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def is_inline(self) -> bool:
+        return self.workers <= 0 or multiprocessing.current_process().daemon
+
+    def convert(self, html: str, remove_ul: bool = True) -> ParsedPage:
+        # A character takes up to 4 bytes, only encode the HTML when it may be over the limit
+        if len(html) * 4 > self.max_html_bytes:
+            encoded = html.encode()
+            if len(encoded) > self.max_html_bytes:
+                print(f"HTML of {len(encoded)} bytes is truncated to {self.max_html_bytes} bytes")
+                html = encoded[: self.max_html_bytes].decode(errors="ignore")
+                return replace(self._parse(html, remove_ul), truncated=True)
+        return self._parse(html, remove_ul)
+
+    def _parse(self, html: str, remove_ul: bool) -> ParsedPage:
+        if self.is_inline:
+            return parse_page(html, remove_ul=remove_ul)
+
+        with self._slots:
+            try:
+                return self._get_pool().submit(parse_page, html, remove_ul).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM killed), start a fresh pool for the next calls
+                self._reset_pool()
+                return parse_page(html, remove_ul=remove_ul)
+
+    async def aconvert(self, html: str, remove_ul: bool = True) -> ParsedPage:
+        return await asyncio.to_thread(self.convert, html, remove_ul)
+
+    def shutdown(self) -> None:
+        self._reset_pool()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_get_mp_context(),
+                    max_tasks_per_child=200,
+                )
+            return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+conversion_executor = ConversionExecutor(
+    workers=settings.conversion_workers,
+    max_pending=settings.conversion_max_pending,
+    max_html_bytes=settings.conversion_max_html_bytes,
+)
+
+atexit.register(conversion_executor.shutdown)
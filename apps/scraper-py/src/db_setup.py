@@ -1,54 +1,254 @@
+import asyncio
+import os
 import threading
+import weakref
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from time import monotonic
 
 import asyncpg  # noqa: F401
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.pool import NullPool
 
 from .models import Base
 from .settings import settings
 
-thread_local = threading.local()
 
+@dataclass
+class PoolStats:
+    acquired: int = 0
+    total_wait_sec: float = 0.0
+    max_wait_sec: float = 0.0
 
-def create_async_session_maker():
-    if not hasattr(thread_local, "async_engine"):
-        thread_local.async_engine = create_async_engine(
-            settings.async_db_url,
-            poolclass=NullPool,
-            connect_args={
-                "ssl": True,
-                "timeout": 120,
-                "command_timeout": 120,
-            },
-        )
+    def record(self, wait_sec: float) -> None:
+        self.acquired += 1
+        self.total_wait_sec += wait_sec
+        self.max_wait_sec = max(self.max_wait_sec, wait_sec)
 
-        thread_local.session_maker = async_sessionmaker(
-            bind=thread_local.async_engine,
-            expire_on_commit=False,
-            class_=AsyncSession,
-        )
+    @property
+    def avg_wait_ms(self) -> float:
+        return round(self.total_wait_sec * 1000 / self.acquired, 2) if self.acquired else 0.0
+
+
+# asyncpg connections are bound to the event loop they were opened in,
+# so each loop (e.g. API server, Temporal worker, Celery task loop) gets its own pool.
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncEngine]" = (
+    weakref.WeakKeyDictionary()
+)
+_session_makers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, async_sessionmaker]" = (
+    weakref.WeakKeyDictionary()
+)
+_engines_lock = threading.Lock()
+pool_stats = PoolStats()
 
-    return thread_local.session_maker
+
+def create_async_session_maker() -> async_sessionmaker:
+    loop = asyncio.get_running_loop()
+    with _engines_lock:
+        if loop not in _session_makers:
+            engine = create_async_engine(
+                settings.async_db_url,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+                pool_recycle=settings.db_pool_recycle,
+                pool_pre_ping=settings.db_pool_pre_ping,
+                connect_args={
+                    "ssl": True,
+                    "timeout": 120,
+                    "command_timeout": 120,
+                },
+            )
+            _engines[loop] = engine
+            _session_makers[loop] = async_sessionmaker(
+                bind=engine,
+                expire_on_commit=False,
+                class_=AsyncSession,
+            )
+        return _session_makers[loop]
 
 
 @asynccontextmanager
 async def get_async_session():
     session_maker = create_async_session_maker()
     async with session_maker() as session:
+        start = monotonic()
+        await session.connection()
+        wait_sec = monotonic() - start
+        with _engines_lock:
+            pool_stats.record(wait_sec)
+        if wait_sec >= settings.db_slow_acquire_sec:
+            print(f"Acquiring a DB connection took {round(wait_sec, 2)} seconds")
         yield session
 
 
+def get_pool_status() -> dict:
+    with _engines_lock:
+        pools = [engine.pool.status() for engine in _engines.values()]
+        return {
+            "pools": pools,
+            "acquired": pool_stats.acquired,
+            "avg_acquire_ms": pool_stats.avg_wait_ms,
+            "max_acquire_ms": round(pool_stats.max_wait_sec * 1000, 2),
+        }
+
+
+def _reset_engines_after_fork() -> None:
+    # Forked children (e.g. Celery prefork workers) must not reuse the parent's sockets
+    for engine in list(_engines.values()):
+        engine.sync_engine.dispose(close=False)
+    _engines.clear()
+    _session_makers.clear()
+    global _engines_lock, pool_stats
+    _engines_lock = threading.Lock()
+    pool_stats = PoolStats()
+
+
+os.register_at_fork(after_in_child=_reset_engines_after_fork)
+
+
+# Changes to tables that already exist, `create_all` only creates the missing ones.
+# Each migration runs once, in order, and is recorded in `schema_migrations`.
+# Statements must also work on a database that `create_all` just created.
+MIGRATIONS: list[tuple[str, list[str]]] = [
+    (
+        "0001_task_child_counters",
+        [
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS child_total INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS child_done INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS child_failed INTEGER NOT NULL DEFAULT 0",
+            """
+            UPDATE tasks SET
+                child_total = children.total,
+                child_done = children.done,
+                child_failed = children.failed
+            FROM (
+                SELECT
+                    parent_task_id,
+                    count(*) AS total,
+                    count(*) FILTER (
+                        WHERE status IN ('completed', 'failed', 'aborted')
+                    ) AS done,
+                    count(*) FILTER (WHERE status = 'failed') AS failed
+                FROM tasks
+                WHERE parent_task_id IS NOT NULL
+                GROUP BY parent_task_id
+            ) AS children
+            WHERE tasks.id = children.parent_task_id
+            """,
+        ],
+    ),
+    (
+        # Results written before stay in `tasks.result` and are read from there
+        "0002_result_blobs",
+        [
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS result_hash VARCHAR",
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS result_size INTEGER",
+            "CREATE INDEX IF NOT EXISTS ix_tasks_result_hash ON tasks (result_hash)",
+            "ALTER TABLE task_child_results ADD COLUMN IF NOT EXISTS result_hash VARCHAR",
+            "CREATE INDEX IF NOT EXISTS ix_task_child_results_result_hash "
+            "ON task_child_results (result_hash)",
+        ],
+    ),
+]
+
+# Index builds on `tasks`, too slow to run on startup while writes to it are blocked.
+# They run with `python run.py migrate`, CONCURRENTLY and so outside of a transaction,
+# and are recorded in `schema_migrations` as well.
+INDEX_MIGRATIONS: list[tuple[str, list[str]]] = [
+    (
+        # See `Task.__table_args__`, the composite and partial indexes replace the
+        # single column ones on sort_id and is_sync. Nothing looks tasks up by
+        # cached_key since results are cached in `content_cache`.
+        "0003_task_query_indexes",
+        [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_sort_id_id "
+            "ON tasks (sort_id DESC, id DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_parent_task_id "
+            "ON tasks (parent_task_id) WHERE parent_task_id IS NOT NULL",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_claim_queue "
+            "ON tasks (sort_id DESC, is_sync DESC, id) "
+            "WHERE status IN ('pending', 'in_progress')",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_sort_id",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_is_sync",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_cached_key",
+            "ANALYZE tasks",
+        ],
+    ),
+]
+
+# Any constant works, it only has to be the same for all the processes
+MIGRATIONS_LOCK_ID = 720_143_001
+# A separate lock, so that replicas don't wait on startup for the index builds
+INDEX_MIGRATIONS_LOCK_ID = 720_143_002
+
+
+def applied_migrations(connection) -> set[str]:
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations "
+            "(name VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        )
+    )
+    return set(connection.scalars(text("SELECT name FROM schema_migrations")))
+
+
+def apply_migration(connection, name: str, statements: list[str]) -> None:
+    for statement in statements:
+        connection.execute(text(statement))
+    connection.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+    print(f"Applied migration {name}")
+
+
+def run_migrations(connection) -> None:
+    # Replicas starting together wait for the first one to migrate
+    connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+    applied = applied_migrations(connection)
+    for name, statements in MIGRATIONS:
+        if name not in applied:
+            apply_migration(connection, name, statements)
+    pending = [name for name, _ in INDEX_MIGRATIONS if name not in applied]
+    if pending:
+        print(f"Index migrations {pending} are pending, run `python run.py migrate`")
+
+
+def run_index_migrations() -> None:
+    engine = create_engine(settings.db_url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": INDEX_MIGRATIONS_LOCK_ID})
+        try:
+            # A failed concurrent build leaves an invalid index behind, which
+            # IF NOT EXISTS would keep. No other build runs while the lock is held.
+            invalid = connection.scalars(
+                text(
+                    "SELECT index.relname FROM pg_index "
+                    "JOIN pg_class AS index ON index.oid = pg_index.indexrelid "
+                    "WHERE pg_index.indrelid = 'tasks'::regclass AND NOT pg_index.indisvalid"
+                )
+            ).all()
+            for index_name in invalid:
+                connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+            applied = applied_migrations(connection)
+            for name, statements in INDEX_MIGRATIONS:
+                if name not in applied:
+                    apply_migration(connection, name, statements)
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": INDEX_MIGRATIONS_LOCK_ID}
+            )
+    engine.dispose()
+
+
 def create_database():
     engine = create_engine(
         settings.db_url,
     )
     Base.metadata.create_all(engine)
-
-
-create_database()
+    with engine.begin() as connection:
+        run_migrations(connection)
+    engine.dispose()
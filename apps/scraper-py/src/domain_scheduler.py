@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import weakref
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from time import monotonic
+from urllib.parse import urlparse
+
+from .scrape_helpers import domain_limits
+from .settings import settings
+
+
+@dataclass(frozen=True)
+class DomainLimits:
+    concurrency: int
+    min_interval_sec: float
+
+
+@dataclass
+class _DomainSlots:
+    active: int = 0
+    last_start: float = float("-inf")
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+
+def get_domain(url: str) -> str:
+    return urlparse(url).netloc.lower().removeprefix("www.")
+
+
+class DomainScheduler:
+    """
+    Limits how many tasks of a domain run at a time and how soon after each other they
+    start. A task waits for its domain before it takes one of the executor's slots, so
+    tasks of other domains fill the slots meanwhile.
+
+    Limits come from `scrape_helpers.domain_limits` (matched on the domain and its parent
+    domains) or the defaults. Every bot detection on a domain doubles its backoff factor,
+    up to `max_backoff`, and every success shrinks it back towards 1. The concurrency is
+    divided and the interval multiplied by that factor.
+    """
+
+    def __init__(
+        self,
+        *,
+        default_limits: DomainLimits,
+        limits: dict[str, dict] | None = None,
+        max_backoff: float = 16,
+        wait_poll_sec: float = 10,
+    ) -> None:
+        self.default_limits = default_limits
+        self.limits = {
+            domain.removeprefix("www."): value for domain, value in (limits or {}).items()
+        }
+        self.max_backoff = max_backoff
+        self.wait_poll_sec = wait_poll_sec
+        # Outcomes are reported from the scraper threads
+        self._backoff: dict[str, float] = {}
+        self._backoff_lock = threading.Lock()
+        # asyncio conditions are bound to the event loop they are used in
+        self._slots: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, _DomainSlots]
+        ] = weakref.WeakKeyDictionary()
+
+    def configured_limits(self, domain: str) -> DomainLimits:
+        labels = domain.split(".")
+        for i in range(len(labels)):
+            value = self.limits.get(".".join(labels[i:]))
+            if value is not None:
+                return DomainLimits(**{**self.default_limits.__dict__, **value})
+        return self.default_limits
+
+    def max_interval_sec(self) -> float:
+        """The longest a task may have to wait after the previous task of its domain started."""
+        intervals = [self.default_limits.min_interval_sec] + [
+            value.get("min_interval_sec", self.default_limits.min_interval_sec)
+            for value in self.limits.values()
+        ]
+        return max(intervals) * self.max_backoff
+
+    def limits_for(self, domain: str) -> DomainLimits:
+        limits = self.configured_limits(domain)
+        with self._backoff_lock:
+            backoff = self._backoff.get(domain, 1)
+        return DomainLimits(
+            concurrency=max(1, int(limits.concurrency / backoff)),
+            min_interval_sec=limits.min_interval_sec * backoff,
+        )
+
+    def record_outcome(self, url: str, *, bot_detected: bool) -> None:
+        domain = get_domain(url)
+        with self._backoff_lock:
+            backoff = self._backoff.get(domain, 1)
+            if bot_detected:
+                backoff = min(backoff * 2, self.max_backoff)
+                print(f"Bot detected on {domain}, slowing it down by {backoff}x")
+            else:
+                backoff = max(backoff * 0.8, 1)
+            if backoff == 1:
+                self._backoff.pop(domain, None)
+            else:
+                self._backoff[domain] = backoff
+
+    def _domain_slots(self, domain: str) -> _DomainSlots:
+        loop = asyncio.get_running_loop()
+        if loop not in self._slots:
+            self._slots[loop] = {}
+        slots = self._slots[loop]
+        if domain not in slots:
+            slots[domain] = _DomainSlots()
+        return slots[domain]
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        url: str,
+        on_wait: Callable | None = None,
+        limiter: asyncio.Semaphore | None = None,
+    ) -> AsyncIterator[None]:
+        """
+        Wait until a task of `url` may start within its domain's limits, then for `limiter`,
+        the slots of the caller. `on_wait` is called every `wait_poll_sec` while waiting for
+        the domain, e.g. to heartbeat.
+        """
+        domain = get_domain(url)
+        slots = self._domain_slots(domain)
+        async with slots.changed:
+            while True:
+                limits = self.limits_for(domain)
+                delay = slots.last_start + limits.min_interval_sec - monotonic()
+                if slots.active < limits.concurrency and delay <= 0:
+                    break
+                if on_wait:
+                    on_wait()
+                timeout = self.wait_poll_sec
+                if slots.active < limits.concurrency:
+                    timeout = min(delay, timeout)
+                try:
+                    await asyncio.wait_for(slots.changed.wait(), timeout)
+                except TimeoutError:
+                    pass
+            # the next task of the domain waits until this one has really started
+            if limiter:
+                await limiter.acquire()
+            slots.active += 1
+            slots.last_start = monotonic()
+        try:
+            yield
+        finally:
+            if limiter:
+                limiter.release()
+            async with slots.changed:
+                slots.active -= 1
+                slots.changed.notify_all()
+
+
+domain_scheduler = DomainScheduler(
+    default_limits=DomainLimits(
+        concurrency=settings.domain_concurrency,
+        min_interval_sec=settings.domain_min_interval_sec,
+    ),
+    limits=domain_limits,
+)
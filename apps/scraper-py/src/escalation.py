@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from time import monotonic
+from typing import TypeVar
+from urllib.parse import urlparse
+
+from .exceptions import BotDetectedException
+from .settings import settings
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class EscalationTier:
+    """
+    A way to fetch a page. `cost` is the relative cost of an attempt (proxy traffic,
+    remote browser time), `attempts` is how many failed attempts escalate to the next tier.
+    """
+
+    name: str
+    use_proxy: bool = False
+    use_cdp: bool = False
+    cost: float = 1
+    attempts: int = 1
+
+
+ESCALATION_LADDER = (
+    EscalationTier("direct", cost=1, attempts=2),
+    EscalationTier("proxy", use_proxy=True, cost=3, attempts=2),
+    EscalationTier("cdp", use_cdp=True, cost=4, attempts=2),
+)
+
+
+@dataclass(frozen=True)
+class RetryBudget:
+    """
+    Limits of a run. `attempt_sec` is the expected duration of an attempt (navigation,
+    readiness wait, conversion), reserved in `max_seconds` before retrying.
+    """
+
+    max_attempts: int
+    max_seconds: float
+    max_cost: float
+    attempt_sec: float = 0
+
+
+class TierMemory:
+    """The tier that last succeeded for each domain, forgotten after `ttl_sec`."""
+
+    def __init__(self, ttl_sec: float) -> None:
+        self.ttl_sec = ttl_sec
+        self._tiers: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, domain: str) -> str | None:
+        with self._lock:
+            entry = self._tiers.get(domain)
+            if entry is None:
+                return None
+            tier_name, stored_at = entry
+            if monotonic() - stored_at > self.ttl_sec:
+                # try the cheaper tiers again from time to time
+                del self._tiers[domain]
+                return None
+            return tier_name
+
+    def remember(self, domain: str, tier_name: str) -> None:
+        with self._lock:
+            self._tiers[domain] = (tier_name, monotonic())
+
+
+class EscalationStrategy:
+    """
+    Runs an attempt function on the tiers of `ladder`, cheapest first.
+
+    A bot detection escalates to the next tier right away, other errors are retried on
+    the same tier `tier.attempts` times first. Attempts are separated by a jittered
+    exponential backoff. The first tier is the one that last succeeded for the domain,
+    or `min_tier` if it's higher. The run gives up with the last error once the top
+    tier is exhausted or the next attempt wouldn't fit in the budget. The time an attempt
+    needs is the longest of `budget.attempt_sec` and the attempts made so far.
+    """
+
+    def __init__(
+        self,
+        ladder: tuple[EscalationTier, ...],
+        memory: TierMemory,
+        *,
+        backoff_base_sec: float,
+        backoff_max_sec: float,
+    ) -> None:
+        self.ladder = ladder
+        self.memory = memory
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+
+    def tier_index(self, *, use_proxy: bool = False, use_cdp: bool = False) -> int:
+        """Index of the cheapest tier that satisfies the given requirements."""
+        for index, tier in enumerate(self.ladder):
+            if (tier.use_cdp or not use_cdp) and (tier.use_proxy or tier.use_cdp or not use_proxy):
+                return index
+        return len(self.ladder) - 1
+
+    def backoff(self, attempt: int) -> float:
+        # "full jitter", so that retries of many tasks of one domain don't line up
+        delay = min(self.backoff_max_sec, self.backoff_base_sec * 2**attempt)
+        return random.uniform(0, delay)  # noqa: S311 jitter, not crypto
+
+    def run(
+        self,
+        url: str,
+        attempt_fn: Callable[[EscalationTier], T],
+        *,
+        budget: RetryBudget,
+        min_tier: int = 0,
+        on_heartbeat: Callable | None = None,
+    ) -> T:
+        domain = urlparse(url).netloc.lower().removeprefix("www.")
+        tier_names = [tier.name for tier in self.ladder]
+        remembered = self.memory.get(domain)
+        index = max(min_tier, tier_names.index(remembered) if remembered in tier_names else 0)
+
+        started_at = monotonic()
+        attempt = 0
+        spent = 0.0
+        attempt_sec = budget.attempt_sec
+        failures_on_tier = 0
+        while True:
+            tier = self.ladder[index]
+            attempt += 1
+            spent += tier.cost
+            attempt_started_at = monotonic()
+            try:
+                result = attempt_fn(tier)
+            except Exception as e:
+                attempt_sec = max(attempt_sec, monotonic() - attempt_started_at)
+                failures_on_tier += 1
+                if isinstance(e, BotDetectedException) or failures_on_tier >= tier.attempts:
+                    if index + 1 == len(self.ladder):
+                        print(f"Giving up on {url} after {attempt} attempts, all tiers failed")
+                        raise
+                    index, failures_on_tier = index + 1, 0
+                next_tier = self.ladder[index]
+                delay = self.backoff(attempt)
+                if (
+                    attempt >= budget.max_attempts
+                    or spent + next_tier.cost > budget.max_cost
+                    or monotonic() - started_at + delay + attempt_sec > budget.max_seconds
+                ):
+                    print(
+                        f"Giving up on {url} after {attempt} attempts, cost {spent} "
+                        f"and {round(monotonic() - started_at)}s, the retry budget is spent"
+                    )
+                    raise
+                print(
+                    f"Attempt {attempt} on the {tier.name} tier failed with error: {e}, "
+                    f"retrying on the {next_tier.name} tier in {delay:.1f}s"
+                )
+                if on_heartbeat:
+                    on_heartbeat()
+                time.sleep(delay)
+            else:
+                self.memory.remember(domain, tier.name)
+                return result
+
+
+escalation_strategy = EscalationStrategy(
+    ESCALATION_LADDER,
+    TierMemory(settings.scrape_tier_memory_ttl_sec),
+    backoff_base_sec=settings.scrape_backoff_base_sec,
+    backoff_max_sec=settings.scrape_backoff_max_sec,
+)
@@ -1,22 +1,28 @@
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
 from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+from .db_setup import get_pool_status
+from .errors import JsonHTTPResponseWithMessage
 from .links import Filters
 from .routes_db_logic import (
     OK_MESSAGE,
+    count_tasks,
     execute_async_tasks,
     execute_get_task_results,
     execute_get_tasks,
     get_task_from_db,
-    perform_get_tasks_results,
     perform_patch_task,
+    stream_tasks,
+    stream_tasks_results,
 )
 from .sitemap import Sitemap
 
@@ -63,6 +69,60 @@ def jsonify(data: Any) -> JSONResponse:
     return JSONResponse(content=data)
 
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def dumps(data: Any) -> bytes:
+    # Same encoding as JSONResponse
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+async def iter_chunks(parts: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+    async for part in parts:
+        buffer += part
+        if len(buffer) >= STREAM_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def iter_json_array(
+    rows: AsyncIterator[Any], head: bytes = b"", tail: bytes = b""
+) -> AsyncIterator[bytes]:
+    yield head + b"["
+    separator = b""
+    async for row in rows:
+        yield separator + dumps(row)
+        separator = b","
+    yield b"]" + tail
+
+
+async def iter_ndjson(rows: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    async for row in rows:
+        yield dumps(row) + b"\n"
+
+
+def stream_rows(
+    request: Request, rows: AsyncIterator[Any], envelope: dict[str, Any] | None = None
+) -> StreamingResponse:
+    """
+    Stream rows as NDJSON if the client accepts it, otherwise as a JSON array,
+    wrapped into `envelope` under the "results" key when given.
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(iter_chunks(iter_ndjson(rows)), media_type=NDJSON_MEDIA_TYPE)
+    head, tail = b"", b""
+    if envelope is not None:
+        head = dumps(envelope)[:-1] + (b',"results":' if envelope else b'"results":')
+        tail = b"}"
+    return StreamingResponse(
+        iter_chunks(iter_json_array(rows, head, tail)), media_type="application/json"
+    )
+
+
 @app.get("/", include_in_schema=False)
 def home() -> RedirectResponse:
     return RedirectResponse(url="/api")
@@ -73,6 +133,11 @@ def api_root() -> dict[str, str]:
     return JSONResponse(content=OK_MESSAGE)
 
 
+@app.get("/api/db/pool")
+def db_pool_status() -> JSONResponse:
+    return jsonify(get_pool_status())
+
+
 @app.post("/api/tasks/create-task-async", response_model=TaskResponse | list[TaskResponse])
 async def create_task_async(task_request: TaskRequest | list[TaskRequest]):
     json_data = (
@@ -86,22 +151,39 @@ async def create_task_async(task_request: TaskRequest | list[TaskRequest]):
 
 @app.get("/api/tasks")
 async def get_tasks(
+    request: Request,
     page: int = Query(1, ge=1),
     per_page: int | None = Query(None, ge=1),
     with_results: bool = Query(True),
+    after: str | None = Query(None),
 ):
+    if per_page is None and after is None:
+        # All tasks are requested, stream them instead of loading the whole table
+        envelope = {
+            "count": await count_tasks(),
+            "total_pages": 1,
+            "next": None,
+            "previous": None,
+            "next_cursor": None,
+        }
+        return stream_rows(request, stream_tasks(with_results), envelope)
+
     query_dict = {
         "page": str(page),
         "per_page": str(per_page) if per_page else None,
         "with_results": "true" if with_results else "false",
+        "after": after,
     }
-    result = await execute_get_tasks(query_dict)
+    try:
+        result = await execute_get_tasks(query_dict)
+    except ValueError as e:
+        return JsonHTTPResponseWithMessage(str(e))
     return result
 
 
 @app.get("/api/tasks/{task_id}")
-async def get_task(task_id: int):
-    return await get_task_from_db(task_id)
+async def get_task(task_id: int, with_results: bool = Query(True)):
+    return await get_task_from_db(task_id, with_results)
 
 
 @app.post("/api/tasks/{task_id}/results")
@@ -121,8 +203,7 @@ async def abort_single_task(task_id: int):
 async def get_ui_tasks_results(request: Request):
     json_data = await request.json()
     task_ids = json_data["task_ids"]
-    results = await perform_get_tasks_results(task_ids)
-    return jsonify(results)
+    return stream_rows(request, stream_tasks_results(task_ids))
 
 
 @app.delete("/api/tasks/{task_id}")
@@ -4,7 +4,9 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
 )
 from sqlalchemy.orm import declarative_base
@@ -61,10 +63,10 @@ class Task(Base):
     id = Column(Integer, primary_key=True)
     status = Column(String, index=True)
 
-    sort_id = Column(Integer, index=True)
+    sort_id = Column(Integer)
 
     scraper_name = Column(String, index=True)
-    is_sync = Column(Boolean, index=True)
+    is_sync = Column(Boolean)
 
     parent_task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
 
@@ -75,8 +77,17 @@ class Task(Base):
     meta_data = Column(JSON)
     result_count = Column(Integer, default=0)
 
+    # Maintained by `TaskHelper` when children are added and finished
+    child_total = Column(Integer, nullable=False, default=0, server_default="0")
+    child_done = Column(Integer, nullable=False, default=0, server_default="0")
+    child_failed = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Only set on rows written before results moved to `result_blobs`
     result = Column(JSON, nullable=True)
-    cached_key = Column(String, nullable=True, index=True)
+    # Reference to the result in `result_blobs`, `result_size` is its uncompressed size
+    result_hash = Column(String, nullable=True, index=True)
+    result_size = Column(Integer, nullable=True)
+    cached_key = Column(String, nullable=True)
 
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(
@@ -85,5 +96,53 @@ class Task(Base):
         onupdate=func.now(),
     )
 
+    # Existing databases get these from `python run.py migrate`, see `db_setup`,
+    # `benchmarks/task_queries.py` checks that the queries below use them
+    __table_args__ = (
+        # Task listing, by page and by cursor: ORDER BY sort_id DESC, id DESC
+        Index("ix_tasks_sort_id_id", sort_id.desc(), id.desc()),
+        # Children of a task, most tasks have no parent
+        Index(
+            "ix_tasks_parent_task_id",
+            parent_task_id,
+            postgresql_where=parent_task_id.is_not(None),
+        ),
+        # Task claims: the most urgent PENDING tasks first, along with the stale
+        # IN_PROGRESS ones, so that the ordered scan serves both arms of the claim
+        Index(
+            "ix_tasks_claim_queue",
+            sort_id.desc(),
+            is_sync.desc(),
+            id,
+            postgresql_where=status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
+        ),
+    )
+
     def to_json(self, with_result=True):
         return serialize_task(self, with_result)
+
+
+class TaskChildResult(Base):
+    """Results of the finished children of a task, appended as they complete."""
+
+    __tablename__ = "task_child_results"
+
+    id = Column(Integer, primary_key=True)
+    parent_task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
+    child_task_id = Column(Integer, nullable=True)
+    result_count = Column(Integer, default=0)
+    result = Column(JSON, nullable=True)
+    result_hash = Column(String, nullable=True, index=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class ResultBlob(Base):
+    """Compressed JSON results, stored once per content hash, see `result_store`."""
+
+    __tablename__ = "result_blobs"
+
+    hash = Column(String, primary_key=True)
+    size = Column(Integer)
+    compressed_size = Column(Integer)
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, server_default=func.now())
@@ -1,10 +1,18 @@
+import asyncio
 import base64
+import binascii
+import hashlib
+import os
 import re
+import threading
 import uuid
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
 from json import dumps, loads
 from urllib.parse import urlencode
 
+import httpx
 from geventhttpclient import HTTPClient
 
 from . import response
@@ -36,6 +44,144 @@ def verify_proxy(proxy: str) -> None:
         raise ProxyFormatException(f"Invalid proxy: {proxy}")
 
 
+# max number of keep-alive connections from one thread to the local go server
+BRIDGE_POOL_SIZE = 32
+# max number of concurrent connections from one event loop to the local go server
+ASYNC_BRIDGE_MAX_CONNECTIONS = 256
+# time the go server gets on top of a request's own timeout to answer the bridge call
+BRIDGE_TIMEOUT_MARGIN_SEC = 10
+# max number of go sessions shared by ephemeral clients, one per TLS profile, proxy and verify
+EPHEMERAL_SESSIONS_MAX = 64
+
+# HTTPClient's connection pool is greenlet-safe, but bound to the gevent hub of its thread
+_bridge_clients = threading.local()
+
+# httpx.AsyncClient connections are bound to the event loop they were opened in
+_async_bridge_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_bridge_client() -> httpx.AsyncClient:
+    """Non-blocking pooled http client for the local go server, one per event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_bridge_clients:
+        _async_bridge_clients[loop] = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{library.PORT}",
+            # replaced by each request's own timeout, see `bridge_timeout`
+            timeout=httpx.Timeout(BRIDGE_TIMEOUT_MARGIN_SEC),
+            # the go server is local, never route to it through *_PROXY env variables
+            trust_env=False,
+            limits=httpx.Limits(
+                max_connections=ASYNC_BRIDGE_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_BRIDGE_MAX_CONNECTIONS,
+            ),
+        )
+    return _async_bridge_clients[loop]
+
+
+def bridge_timeout(request_payload: dict) -> httpx.Timeout:
+    """Timeout of a bridge call, the request's timeout plus a margin for the go server."""
+    timeout = request_payload["timeoutMilliseconds"] / 1000 + BRIDGE_TIMEOUT_MARGIN_SEC
+    # waiting for a pooled connection is bounded by the timeouts of the calls holding them
+    return httpx.Timeout(timeout, pool=None)
+
+
+class JsonBridgeCodec:
+    """Wire format of the go server: JSON with base64 encoded byte bodies."""
+
+    name = "json"
+
+    def encode_request(self, payload: dict | list) -> str | bytes:
+        return dumps(payload)
+
+    def decode_response(self, data: bytes) -> dict | list:
+        return loads(data)
+
+
+class CompactJsonBridgeCodec(JsonBridgeCodec):
+    """
+    Same wire format with less work per request: null fields and whitespace are left out
+    of request payloads, and base64 response bodies are decoded to bytes right after parsing
+    without an intermediate ASCII copy.
+    """
+
+    name = "compact"
+
+    def encode_request(self, payload: dict | list) -> str | bytes:
+        if isinstance(payload, list):
+            payload = [self._strip_nulls(item) for item in payload]
+        else:
+            payload = self._strip_nulls(payload)
+        return dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def decode_response(self, data: bytes) -> dict | list:
+        response_object = loads(data)
+        for item in response_object if isinstance(response_object, list) else [response_object]:
+            responses = item["history"] if item.get("isHistory") else [item.get("response")]
+            for res in responses:
+                if res and res.get("isBase64") and isinstance(res.get("body"), str):
+                    res["body"] = binascii.a2b_base64(res["body"])
+        return response_object
+
+    @staticmethod
+    def _strip_nulls(payload: dict) -> dict:
+        # the go server treats missing and null fields alike
+        return {key: value for key, value in payload.items() if value is not None}
+
+
+BRIDGE_CODECS: dict[str, JsonBridgeCodec] = {
+    codec.name: codec for codec in (JsonBridgeCodec(), CompactJsonBridgeCodec())
+}
+
+
+def get_bridge_client() -> HTTPClient:
+    """Keep-alive http client for the local go server shared by all sessions of the thread."""
+    client = getattr(_bridge_clients, "client", None)
+    if client is None:
+        client = HTTPClient(
+            "127.0.0.1",
+            library.PORT,
+            ssl=False,
+            insecure=True,
+            connection_timeout=1e9,
+            network_timeout=1e9,
+            concurrency=BRIDGE_POOL_SIZE,
+        )
+        _bridge_clients.client = client
+    return client
+
+
+def _reset_bridge_clients_after_fork() -> None:
+    # the child must not reuse the parent's sockets
+    global _bridge_clients
+    _bridge_clients = threading.local()
+    _async_bridge_clients.clear()
+
+
+os.register_at_fork(after_in_child=_reset_bridge_clients_after_fork)
+
+
+# ephemeral go session ids, least recently used first
+_ephemeral_sessions: "OrderedDict[str, None]" = OrderedDict()
+_ephemeral_sessions_lock = threading.Lock()
+
+
+def use_ephemeral_session(session_id: str) -> None:
+    """
+    Mark a shared go session as used. Go sessions are never destroyed by ephemeral clients,
+    so with rotating proxies the least recently used ones are destroyed here instead.
+    """
+    evicted: list[str] = []
+    with _ephemeral_sessions_lock:
+        _ephemeral_sessions[session_id] = None
+        _ephemeral_sessions.move_to_end(session_id)
+        while len(_ephemeral_sessions) > EPHEMERAL_SESSIONS_MAX:
+            evicted.append(_ephemeral_sessions.popitem(last=False)[0])
+    for evicted_id in evicted:
+        library.destroy_session(evicted_id)
+
+
 def addcookies(headers, value):
     if "cookie" in headers:
         headers["Cookie"] = headers["cookie"]
@@ -62,6 +208,10 @@ class TLSClient:
     certificate_pinning: dict[str, list[str]] | None = None
     disable_ipv6: bool = False
     detect_encoding: bool = True  # only disable if you are confident the encoding is utf-8
+    # reuse a shared go session per TLS profile instead of creating and destroying one
+    ephemeral: bool = False
+    # how requests and responses are encoded for the go server, see BRIDGE_CODECS
+    wire_format: str = "json"
 
     # custom TLS profile
     ja3_string: str | None = None
@@ -250,6 +400,19 @@ class TLSClient:
         "weight": 1
     }
 
+    Ephemeral sessions
+    self.ephemeral = True makes the session share a go session with every other ephemeral
+    session of the same TLS profile, proxy and verify setting. Nothing is created or destroyed
+    on the go side per session, and its connections to target hosts are reused.
+    The go session doesn't store cookies, they're only sent from this session's jar.
+    Requests that follow redirects use a go session of their own instead, destroyed on close,
+    so that cookies set along the redirect chain are kept.
+    At most EPHEMERAL_SESSIONS_MAX shared go sessions are kept, the least recently used
+    ones are destroyed.
+
+    Wire format
+    self.wire_format examples: "json" (default), "compact"
+
     Proxies
     self.proxy usage:
     - "http://user:pass@ip:port",
@@ -265,24 +428,73 @@ class TLSClient:
             self.proxy = self.unpack_proxy(self.proxies)
             del self.proxies
 
-        # http client for local go server
-        self.server = HTTPClient(
-            "127.0.0.1",
-            library.PORT,
-            ssl=False,
-            insecure=True,
-            connection_timeout=1e9,
-            network_timeout=1e9,
-        )
+        if self.wire_format not in BRIDGE_CODECS:
+            raise ValueError(
+                f"Unknown wire format '{self.wire_format}', expected one of {list(BRIDGE_CODECS)}"
+            )
         # CookieJar containing all currently outstanding cookies set on this session
         self.cookies: RequestsCookieJar = self.cookies or RequestsCookieJar()
         self._closed: bool = False  # indicate if session is closed
+        # whether the go session of `_session_id` may exist and has to be destroyed on close
+        self._owns_session: bool = not self.ephemeral
+
+    @property
+    def codec(self) -> JsonBridgeCodec:
+        return BRIDGE_CODECS[self.wire_format]
+
+    @property
+    def server(self) -> HTTPClient:
+        # http client for local go server
+        return get_bridge_client()
 
     def close(self):
         if not self._closed:
             self._closed = True
-            library.destroy_session(self._session_id)
-            self.server.close()
+            if self._owns_session:
+                library.destroy_session(self._session_id)
+
+    def _cookies_to_send(self, url: str, shared_session: bool) -> list:
+        if shared_session:
+            # the go session doesn't keep cookies, every matching one has to be sent
+            return self.cookies.cookies_for_url(url)
+        if self.ephemeral:
+            # a go session of its own, which may follow redirects to other hosts
+            return list(self.cookies)
+        # the go session keeps the cookies it was sent or received, only send the changes
+        return self.cookies.pop_changes(url)
+
+    def _restore_cookies(self, request_payload: dict) -> None:
+        # the request didn't reach the go session, send its cookie changes with the next one
+        if not self.ephemeral:
+            self.cookies.restore_changes(request_payload["requestCookies"])
+
+    def _ephemeral_session_id(self, proxy: str | None, verify: bool | None) -> str:
+        # go sessions keep the TLS profile, proxy and verify setting they were created with
+        profile = dumps(
+            [
+                self.client_identifier,
+                self.random_tls_extension_order,
+                self.force_http1,
+                self.disable_ipv6,
+                self.certificate_pinning,
+                self.ja3_string,
+                self.h2_settings,
+                self.h2_settings_order,
+                self.supported_signature_algorithms,
+                self.supported_delegated_credentials_algorithms,
+                self.supported_versions,
+                self.key_share_curves,
+                self.cert_compression_algo,
+                self.pseudo_header_order,
+                self.connection_flow,
+                self.priority_frames,
+                self.header_priority,
+                proxy,
+                bool(verify),
+            ],
+            sort_keys=True,
+        )
+        return "ephemeral-" + hashlib.sha256(profile.encode()).hexdigest()[:32]
 
     def __enter__(self):
         return self
@@ -365,10 +577,19 @@ class TLSClient:
         if proxy:
             verify_proxy(proxy)
 
+        # A go session without a cookie jar drops the cookies set along the redirects it follows
+        shared_session = self.ephemeral and not allow_redirects
+        if shared_session:
+            session_id = self._ephemeral_session_id(proxy, verify)
+            use_ephemeral_session(session_id)
+        else:
+            session_id = self._session_id
+            self._owns_session = True
+
         # Request
         is_byte_request = isinstance(request_body, (bytes | bytearray))
         request_payload = {
-            "sessionId": self._session_id,
+            "sessionId": session_id,
             "followRedirects": allow_redirects,
             "wantHistory": history,
             "forceHttp1": self.force_http1,
@@ -386,9 +607,9 @@ class TLSClient:
             "requestBody": (
                 base64.b64encode(request_body).decode() if is_byte_request else request_body
             ),
-            "requestCookies": cookiejar_to_list(self.cookies),
+            "requestCookies": cookiejar_to_list(self._cookies_to_send(url, shared_session)),
             "timeoutMilliseconds": int(timeout * 1000),
-            "withoutCookieJar": False,
+            "withoutCookieJar": shared_session,
             "disableIPv6": self.disable_ipv6,
         }
         if self.certificate_pinning:
@@ -429,6 +650,7 @@ class TLSClient:
             request_headers=headers,
             cookie_jar=self.cookies,
             response_headers=response_object["headers"],
+            synced=not self.ephemeral,
         )
         # build response class
         return response.build_response(response_object, response_cookie_jar, proxy)
@@ -473,10 +695,36 @@ class TLSClient:
         try:
             # send request
             resp = self.server.post(
-                f"http://127.0.0.1:{library.PORT}/request", body=dumps(request_payload)
+                f"http://127.0.0.1:{library.PORT}/request",
+                body=self.codec.encode_request(request_payload),
             )
-            response_object = loads(resp.read())
+            response_object = self.codec.decode_response(resp.read())
         except Exception as e:
+            self._restore_cookies(request_payload)
             raise ClientException("Request failed") from e
         # build response class
         return self.build_response(url, headers, response_object, request_payload["proxyUrl"])
+
+    async def aexecute_request(
+        self,
+        method: str,
+        url: str,
+        headers: dict | CaseInsensitiveDict | None = None,
+        *args,
+        **kwargs,
+    ):
+        """
+        execute a single request without blocking the event loop and return a response object
+        """
+        request_payload, headers = self.build_request(method, url, headers, *args, **kwargs)
+        try:
+            resp = await get_async_bridge_client().post(
+                "/request",
+                content=self.codec.encode_request(request_payload),
+                timeout=bridge_timeout(request_payload),
+            )
+            response_object = self.codec.decode_response(resp.content)
+        except Exception as e:
+            self._restore_cookies(request_payload)
+            raise ClientException("Request failed") from e
+        return self.build_response(url, headers, response_object, request_payload["proxyUrl"])
@@ -1,5 +1,6 @@
 import copy
 import threading
+import time
 from collections.abc import MutableMapping
 from http.client import HTTPMessage
 from http.cookiejar import Cookie, CookieJar
@@ -117,8 +118,18 @@ class RequestsCookieJar(CookieJar, MutableMapping):
     Unlike a regular CookieJar, this class is pickleable.
 
     .. warning:: dictionary operations that are normally O(1) may be O(n).
+
+    The jar also tracks which cookies changed since they were last sent to the TLS bridge,
+    so that sessions only send the changes (see `pop_changes`), and looks up the cookies
+    for a URL by its domain and parent domains instead of scanning the whole jar.
     """
 
+    def __init__(self, policy=None):
+        super().__init__(policy)
+        # (domain, path, name) of cookies set or removed since they were last sent
+        self._dirty: set[tuple[str, str, str]] = set()
+        self._removed: set[tuple[str, str, str]] = set()
+
     def get(self, name, default=None, domain=None, path=None):
         """Dict-like get() that also supports optional domain and path args in
         order to resolve naming collisions from using one cookie jar over
@@ -274,7 +285,113 @@ class RequestsCookieJar(CookieJar, MutableMapping):
             and cookie.value.endswith('"')
         ):
             cookie.value = cookie.value.replace('\\"', "")
-        return super().set_cookie(cookie, *args, **kwargs)
+        result = super().set_cookie(cookie, *args, **kwargs)
+        key = (cookie.domain, cookie.path, cookie.name)
+        self._dirty.add(key)
+        self._removed.discard(key)
+        return result
+
+    def set_synced_cookie(self, cookie):
+        """Set a cookie the TLS bridge already has, e.g. one it received in a response."""
+        self.set_cookie(cookie)
+        self._dirty.discard((cookie.domain, cookie.path, cookie.name))
+
+    def clear(self, domain=None, path=None, name=None):
+        with self._cookies_lock:
+            if domain is None:
+                keys = [
+                    (d, p, n)
+                    for d, paths in self._cookies.items()
+                    for p, c in paths.items()
+                    for n in c
+                ]
+            elif path is None:
+                keys = [(domain, p, n) for p, c in self._cookies[domain].items() for n in c]
+            elif name is None:
+                keys = [(domain, path, n) for n in self._cookies[domain][path]]
+            else:
+                keys = [(domain, path, name)]
+            super().clear(domain, path, name)
+            self._dirty.difference_update(keys)
+            self._removed.update(keys)
+
+    @staticmethod
+    def _domains_for_host(host: str) -> list[str]:
+        # host-only cookies are stored under the host itself, domain cookies under
+        # ".domain", or "domain" when created with a domain without the leading dot,
+        # and cookies created without a domain under ""
+        labels = host.split(".")
+        parents = [".".join(labels[i:]) for i in range(1, len(labels))]
+        return ["", host, "." + host] + ["." + parent for parent in parents] + parents
+
+    @staticmethod
+    def _is_sent_to(cookie: Cookie, host: str) -> bool:
+        # RFC 6265 5.4, a host-only cookie only goes to the host that set it,
+        # a domain cookie to the domain and its subdomains, with or without the dot
+        return (
+            cookie.domain in ("", host) or cookie.domain.startswith(".") or cookie.domain_specified
+        )
+
+    def cookies_for_url(self, url: str) -> list[Cookie]:
+        """Unexpired cookies that would be sent to `url`, in O(matching cookies)."""
+        parsed = urlparse(url)
+        request_path = parsed.path or "/"
+        is_secure = parsed.scheme in ("https", "wss")
+        host = (parsed.hostname or "").lower()
+        now = time.time()
+        result = []
+        with self._cookies_lock:
+            for domain in self._domains_for_host(host):
+                for path, cookies in self._cookies.get(domain, {}).items():
+                    if not (
+                        request_path == path
+                        or request_path.startswith(path if path.endswith("/") else path + "/")
+                    ):
+                        continue
+                    result.extend(
+                        cookie
+                        for cookie in cookies.values()
+                        if (is_secure or not cookie.secure)
+                        and not cookie.is_expired(now)
+                        and self._is_sent_to(cookie, host)
+                    )
+        return result
+
+    def pop_changes(self, url: str) -> list[Cookie]:
+        """
+        Return all the cookies set or removed since they were last sent, so that the TLS
+        bridge has them for the hosts it gets redirected to as well. Removed cookies are
+        returned as expired cookies, which makes the bridge drop them.
+
+        Only the changes the bridge surely accepts for `url` are considered sent, the
+        others are sent again with the next requests until one goes to their domain.
+        """
+        host = (urlparse(url).hostname or "").lower()
+        domains = set(self._domains_for_host(host))
+        with self._cookies_lock:
+            changed = list(self._dirty)
+            cookies = [self._cookies[d][p][n] for d, p, n in changed]
+            removed = list(self._removed)
+            self._dirty.difference_update(
+                key
+                for key, cookie in zip(changed, cookies, strict=True)
+                if key[0] in domains and self._is_sent_to(cookie, host)
+            )
+            self._removed.difference_update(key for key in removed if key[0] in domains)
+        return cookies + [
+            create_cookie(name, "", domain=domain, path=path, expires=1)
+            for domain, path, name in removed
+        ]
+
+    def restore_changes(self, cookies: list[dict]) -> None:
+        """Mark cookies from `pop_changes` (as sent to the bridge) as not sent."""
+        with self._cookies_lock:
+            for cookie in cookies:
+                key = (cookie.get("domain", ""), cookie.get("path", "/"), cookie["name"])
+                if key[2] in self._cookies.get(key[0], {}).get(key[1], {}):
+                    self._dirty.add(key)
+                else:
+                    self._removed.add(key)
 
     def update(self, other):
         """Updates this jar with cookies from another CookieJar or dict-like"""
@@ -347,6 +464,8 @@ class RequestsCookieJar(CookieJar, MutableMapping):
         self.__dict__.update(state)
         if "_cookies_lock" not in self.__dict__:
             self._cookies_lock = threading.RLock()
+        self.__dict__.setdefault("_dirty", set())
+        self.__dict__.setdefault("_removed", set())
 
     def copy(self):
         """Return a copy of this RequestsCookieJar."""
@@ -446,8 +565,18 @@ def extract_cookies_to_jar(
     request_headers,
     cookie_jar: RequestsCookieJar,
     response_headers: dict,
+    synced: bool = False,
 ) -> RequestsCookieJar:
+    """
+    Parse the Set-Cookie headers of a response into a new jar and merge it into `cookie_jar`.
+    `synced` marks the merged cookies as already known to the TLS bridge.
+    """
     response_cookie_jar = cookiejar_from_dict({})
+    # most responses don't set cookies, skip the cookie policy machinery for them
+    if not response_headers or not any(
+        header_name.lower() == "set-cookie" for header_name in response_headers
+    ):
+        return response_cookie_jar
 
     req = MockRequest(request_url, request_headers)
     # mimic HTTPMessage
@@ -458,7 +587,11 @@ def extract_cookies_to_jar(
     res = MockResponse(http_message)
     response_cookie_jar.extract_cookies(res, req)
 
-    merge_cookies(cookie_jar, response_cookie_jar)
+    if synced:
+        for cookie in response_cookie_jar:
+            cookie_jar.set_synced_cookie(cookie)
+    else:
+        merge_cookies(cookie_jar, response_cookie_jar)
     return response_cookie_jar
 
 
@@ -482,7 +615,7 @@ def list_to_cookiejar(browser_cookies: list) -> RequestsCookieJar:
     return cookiejar
 
 
-def cookiejar_to_list(cookiejar: RequestsCookieJar) -> list:
+def cookiejar_to_list(cookiejar: RequestsCookieJar | list[Cookie]) -> list:
     return [
         {
             "session" if key == "discard" else key: val
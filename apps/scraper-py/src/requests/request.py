@@ -65,6 +65,10 @@ class Request(Session):
         func = getattr(tls_request, method)
         return func(url, **kwargs)
 
+    async def _acall(self, method: str, url: str, kwargs: dict):
+        func = getattr(tls_request, f"a{method}")
+        return await func(url, **kwargs)
+
     def get(
         self,
         url: str,
@@ -109,6 +113,50 @@ class Request(Session):
         )
         return self._call("get", url, kwargs)
 
+    async def aget(
+        self,
+        url: str,
+        referer: str = "https://www.google.com/",
+        params=None,
+        data=None,
+        headers=None,
+        browser: Literal["firefox", "chrome"] | None = "firefox",
+        os: Literal["windows", "mac", "linux"] | None = None,
+        user_agent: str | None = None,
+        cookies=None,
+        files=None,
+        auth=None,
+        timeout=None,
+        allow_redirects=True,
+        proxies=None,
+        hooks=None,
+        stream=None,
+        verify=None,
+        cert=None,
+        json=None,
+    ):
+        kwargs = self._build_kwargs(
+            params=params,
+            data=data,
+            headers=headers,
+            cookies=cookies,
+            files=files,
+            auth=auth,
+            timeout=timeout,
+            allow_redirects=allow_redirects,
+            proxies=proxies,
+            hooks=hooks,
+            stream=stream,
+            verify=verify,
+            cert=cert,
+            json=json,
+            browser=browser,
+            user_agent=user_agent,
+            os=os,
+            referer=referer,
+        )
+        return await self._acall("get", url, kwargs)
+
     def options(
         self,
         url: str,
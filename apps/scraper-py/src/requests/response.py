@@ -1,17 +1,15 @@
-import base64
+import binascii
 import json
 import re
-from dataclasses import dataclass
 from datetime import datetime, timedelta
 from http.client import responses as status_codes
-from json import dumps, loads
+from json import loads
 from typing import Literal
 
 from requests.exceptions import HTTPError
 from requests.utils import get_encoding_from_headers
 
 from . import client
-from .cffi import library
 from .cookies import RequestsCookieJar
 from .exceptions import ClientException
 from .toolbelt import CaseInsensitiveDict, FileUtils
@@ -69,47 +67,31 @@ class ProcessResponse:
             raise e
         except OSError as e:
             raise ClientException("Connection error") from e
-        resp.session = None if self.session.temp else self.session
-        resp.browser = self.session.browser
-        return resp
+        return self._attach_session(resp)
 
+    async def asend(self) -> None:
+        time: datetime = datetime.now()
+        self.response = await self.aexecute_request()
+        self.response.elapsed = datetime.now() - time
 
-class ProcessResponsePool:
-    """
-    Processes a pool of ProcessResponse objects
-    """
-
-    def __init__(self, pool: list[ProcessResponse]) -> None:
-        self.pool: list[ProcessResponse] = pool
-
-    def execute_pool(self) -> list["Response"]:
-        values: list = []
-        for proc in self.pool:
-            # get the request data
-            payload, headers = proc.session.build_request(
-                method=proc.method,
-                url=proc.url,
-                cookies=proc.cookies,
-                **proc.kwargs,
-            )
-            # remember full set of headers (including from session)
-            proc.full_headers = headers
-            # add to values
-            values.append(payload)
-        # execute the pool
+    async def aexecute_request(self) -> "Response":
         try:
-            # send request
-            resp = proc.session.server.post(
-                f"http://127.0.0.1:{library.PORT}/multirequest", body=dumps(values)
+            resp = await self.session.aexecute_request(
+                method=self.method,
+                url=self.url,
+                cookies=self.cookies,
+                **self.kwargs,
             )
-            response_object = loads(resp.read())
-        except Exception as e:
+        except ClientException as e:
+            raise e
+        except OSError as e:
             raise ClientException("Connection error") from e
-        # process responses
-        return [
-            proc.session.build_response(proc.url, proc.full_headers, data, payload["proxyUrl"])
-            for proc, data in zip(self.pool, response_object, strict=False)
-        ]
+        return self._attach_session(resp)
+
+    def _attach_session(self, resp: "Response") -> "Response":
+        resp.session = None if self.session.temp else self.session
+        resp.browser = self.session.browser
+        return resp
 
 
 def extract_next_data(html_string):
@@ -129,11 +111,15 @@ def extract_next_data(html_string):
     return next_data
 
 
-@dataclass
 class Response:
     """
     Response object
 
+    The body is kept in a single buffer, `raw`. A base64 body from the TLS bridge is only
+    decoded on first access, and the conversions between bytes and text are done once and
+    cached. Headers from the bridge are only turned into a `CaseInsensitiveDict`
+    when they are accessed.
+
     Methods:
         json: Returns the response body as json
         render: Renders the response body with BrowserSession
@@ -146,29 +132,87 @@ class Response:
         headers (CaseInsensitiveDict): Response headers
         cookies (RequestsCookieJar): Response cookies
         text (str): Response body as text
-        content (Union[str, bytes]): Response body as bytes or str
+        content (bytes): Response body as bytes
+        body_view (memoryview): Read-only view of the response body bytes, without a copy
         ok (bool): True if status code is less than 400
         elapsed (datetime.timedelta): Time elapsed between sending the request and receiving the response
         html (parser.HTML): Response body as HTML parser object
     """
 
-    url: str
-    status_code: int
-    headers: "client.CaseInsensitiveDict"
-    cookies: RequestsCookieJar
-    raw: str | bytes = None
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: "client.CaseInsensitiveDict | None",
+        cookies: RequestsCookieJar,
+        raw: str | bytes = None,
+        history: list["Response"] | None = None,
+        browser: Literal["firefox", "chrome"] | None = None,
+        elapsed: timedelta | None = None,
+        encoding: str | None = None,
+        is_utf8: bool = True,
+        proxy: str | None = None,
+        bridge_headers: dict[str, list[str]] | None = None,
+        base64_body: bool = False,
+    ) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.cookies = cookies
+        # set by ProcessResponse
+        self.history = history
+        self.session = None
+        self.browser = browser
+        self.elapsed = elapsed
+        self.is_utf8 = is_utf8
+        self.proxy = proxy
+        self._headers = headers
+        # headers as sent by the bridge (lists of values), converted on first access
+        self._bridge_headers = bridge_headers
+        self._encoding = encoding
+        self.raw = raw
+        # `raw` is a base64 string that is decoded on first access
+        self._base64_body = base64_body
 
-    # set by ProcessResponse
-    history: list["Response"] | None = None
-    session = None
-    browser: Literal["firefox", "chrome"] | None = None
-    elapsed: timedelta | None = None
-    encoding: str = "UTF-8"
-    is_utf8: bool = True
-    proxy: str | None = None
+    @property
+    def raw(self) -> str | bytes:
+        if self._base64_body:
+            self._raw = binascii.a2b_base64(self._raw)
+            self._base64_body = False
+        return self._raw
+
+    @raw.setter
+    def raw(self, value: str | bytes) -> None:
+        self._raw = value
+        self._base64_body = False
+        self._content = self._text = None
 
-    def __post_init__(self) -> None:
-        self.encoding = get_encoding_from_headers(self.headers) or "utf-8"
+    @property
+    def headers(self) -> "client.CaseInsensitiveDict":
+        if self._headers is None:
+            self._headers = client.CaseInsensitiveDict(
+                {
+                    key: value[0] if len(value) == 1 else value
+                    for key, value in (self._bridge_headers or {}).items()
+                }
+            )
+            self._bridge_headers = None
+        return self._headers
+
+    @headers.setter
+    def headers(self, value: "client.CaseInsensitiveDict") -> None:
+        self._headers = value
+        self._bridge_headers = None
+
+    @property
+    def encoding(self) -> str:
+        if self._encoding is None:
+            self._encoding = get_encoding_from_headers(self.headers) or "utf-8"
+        return self._encoding
+
+    @encoding.setter
+    def encoding(self, value: str) -> None:
+        self._encoding = value
+        self._content = self._text = None
 
     @property
     def reason(self) -> str:
@@ -179,12 +223,25 @@ class Response:
 
     @property
     def content(self) -> bytes:
-        # note: this will convert the content to bytes on each access
-        return self.raw if type(self.raw) is bytes else self.raw.encode(self.encoding)
+        raw = self.raw
+        if type(raw) is bytes:
+            return raw
+        if self._content is None:
+            self._content = raw.encode(self.encoding)
+        return self._content
 
     @property
     def text(self) -> str:
-        return self.raw if type(self.raw) is str else self.raw.decode(self.encoding)
+        raw = self.raw
+        if type(raw) is str:
+            return raw
+        if self._text is None:
+            self._text = raw.decode(self.encoding)
+        return self._text
+
+    @property
+    def body_view(self) -> memoryview:
+        return memoryview(self.content)
 
     @property
     def ok(self) -> bool:
@@ -280,29 +337,20 @@ def parse_header_links(value):
 
 
 def build_response(res: dict | list, res_cookies: RequestsCookieJar, proxy: str | None) -> Response:
-    """Builds a Response object"""
-    # build headers
-    if res["headers"] is None:
-        res_headers = {}
-    else:
-        res_headers = {
-            header_key: header_value[0] if len(header_value) == 1 else header_value
-            for header_key, header_value in res["headers"].items()
-        }
-    # decode bytes response
-    if res.get("isBase64"):
-        res["body"] = base64.b64decode(res["body"].encode())
+    """Builds a Response object, the body and headers are decoded when they are first accessed"""
     return Response(
         # add target / url
         url=res["target"],
         # add status code
         status_code=res["status"],
         # add headers
-        headers=client.CaseInsensitiveDict(res_headers),
+        headers=None,
+        bridge_headers=res["headers"],
         # add cookies
         cookies=res_cookies,
-        # add response body
+        # add response body, base64 unless the bridge codec already decoded it
         raw=res["body"],
+        base64_body=bool(res.get("isBase64")) and isinstance(res["body"], str),
         # if response was utf-8 validated
         is_utf8=not res.get("isBase64"),
         # add proxy
@@ -35,6 +35,8 @@ class TLSSession(TLSClient):
     Methods:
         get(url, *, params=None, headers=None, cookies=None, allow_redirects=True, verify=None, timeout=30, proxy=None):
             Send a GET request
+        aget(url, ...), apost(url, ...), ...:
+            Same as the methods above, but awaitable and don't block the event loop
         post(url, *, params=None, data=None, files=None, headers=None, cookies=None, json=None, allow_redirects=True, verify=None, timeout=30, proxy=None):
             Send a POST request
         options(url, *, params=None, headers=None, cookies=None, allow_redirects=True, verify=None, timeout=30, proxy=None):
@@ -67,6 +69,13 @@ class TLSSession(TLSClient):
 
         self.browser: str = browser  # browser name
         from .tls_request import (
+            adelete,
+            aget,
+            ahead,
+            aoptions,
+            apatch,
+            apost,
+            aput,
             async_delete,
             async_get,
             async_head,
@@ -92,6 +101,15 @@ class TLSSession(TLSClient):
         self.patch: partial = partial(patch, session=self)
         self.delete: partial = partial(delete, session=self)
 
+        # asyncio network methods
+        self.aget: partial = partial(aget, session=self)
+        self.apost: partial = partial(apost, session=self)
+        self.aoptions: partial = partial(aoptions, session=self)
+        self.ahead: partial = partial(ahead, session=self)
+        self.aput: partial = partial(aput, session=self)
+        self.apatch: partial = partial(apatch, session=self)
+        self.adelete: partial = partial(adelete, session=self)
+
         # async network methods
         self.async_get: partial = partial(async_get, session=self)
         self.async_post: partial = partial(async_post, session=self)
@@ -205,6 +223,46 @@ class TLSSession(TLSClient):
         proc.send()
         return proc.response
 
+    async def arequest(
+        self,
+        method: str,
+        url: str,
+        *,
+        data: str | bytes | bytearray | dict | None = None,
+        files: dict | None = None,
+        headers: dict | CaseInsensitiveDict | None = None,
+        cookies: RequestsCookieJar | dict | list | None = None,
+        json: dict | list | str | None = None,
+        allow_redirects: bool = True,
+        history: bool = False,
+        verify: bool | None = None,
+        timeout: float | None = None,
+        proxy: str | None = None,
+        proxies: dict | None = None,  # backwards compatibility
+    ) -> Response:
+        """
+        Send a request with TLS client without blocking the event loop.
+        Accepts the same arguments as `request`.
+        """
+        proc = self.request(
+            method,
+            url,
+            data=data,
+            files=files,
+            headers=headers,
+            cookies=cookies,
+            json=json,
+            allow_redirects=allow_redirects,
+            history=history,
+            verify=verify,
+            timeout=timeout,
+            proxy=proxy,
+            proxies=proxies,
+            process=False,
+        )
+        await proc.asend()
+        return proc.response
+
 
 class Session(TLSSession):
     def __init__(
@@ -1,3 +1,5 @@
+import asyncio
+import builtins
 import time
 import traceback
 from collections.abc import Callable, Iterable
@@ -12,7 +14,8 @@ from urllib.parse import urlencode
 import gevent
 from gevent.pool import Pool
 
-from . import response, session
+from . import session
+from .client import BRIDGE_POOL_SIZE
 from .response import Response
 from .session import Session, chrome
 
@@ -62,6 +65,7 @@ class TLSRequest:
         "certificate_pinning",
         "disable_ipv6",
         "detect_encoding",
+        "wire_format",
     }
 
     def __init__(
@@ -105,12 +109,13 @@ class TLSRequest:
 
     def _build_session(self, session=None):
         if session is None:
+            # one-off sessions share ephemeral go sessions instead of creating their own
             if self.sess_kwargs:
                 # if session kwargs are passed, configure a new session with them
-                self.session = Session(temp=True, **self.sess_kwargs)
+                self.session = Session(temp=True, ephemeral=True, **self.sess_kwargs)
             else:
                 # else use a preconfigured session
-                self.session = chrome.Session(temp=True)
+                self.session = chrome.Session(temp=True, ephemeral=True)
             self._close = True
         else:
             # don't close adapters after each request if the user provided the session
@@ -140,6 +145,26 @@ class TLSRequest:
             self.close_session()
         return self
 
+    async def asend(self, **kwargs):
+        """
+        Same as `send`, but awaits the response without blocking the event loop
+        """
+        merged_kwargs = {}
+        merged_kwargs.update(self.kwargs)
+        merged_kwargs.update(kwargs)
+        if self.session is None:
+            self._build_session()
+        try:
+            self.response = await self.session.arequest(self.method, self.url, **merged_kwargs)
+        except Exception as e:
+            if self.raise_exception:
+                raise e
+            self.exception = e
+            self.traceback = traceback.format_exc()
+        finally:
+            self.close_session()
+        return self
+
     def close_session(self) -> None:
         if self._close and self.session is not None:
             # close the session if it was created by this request
@@ -248,6 +273,16 @@ def request(method: str, url: str | Iterable[str], *args, **kwargs):
     return req.response
 
 
+async def arequest(method: str, url: str, *args, **kwargs) -> Response:
+    """
+    Send a request with TLS client without blocking the event loop.
+    Accepts the same arguments as `request` for a single URL.
+    """
+    req = TLSRequest(method, url, *args, **kwargs)
+    await req.asend()
+    return req.response
+
+
 def async_request(*args, raise_exception=False, **kwargs) -> TLSRequest:
     """
     Return an unsent request to be used with map, imap, and imap_enum.
@@ -337,12 +372,16 @@ def add_redirects(kwargs, default_value):
     }
 
 
+def is_dns_error(e: Exception) -> bool:
+    return "dial tcp: lookup" in str(e) and "no such host" in str(e)
+
+
 def retry_on_network_error(func: Callable):
     while True:
         try:
             return func()
         except Exception as e:
-            if "dial tcp: lookup" in str(e) and "no such host" in str(e):
+            if is_dns_error(e):
                 print(f"Network error occurred: {e}. Retrying in 20 seconds...")
                 time.sleep(20)
                 print("Retrying now...")
@@ -350,6 +389,19 @@ def retry_on_network_error(func: Callable):
                 raise e
 
 
+async def aretry_on_network_error(func: Callable):
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            if is_dns_error(e):
+                print(f"Network error occurred: {e}. Retrying in 20 seconds...")
+                await asyncio.sleep(20)
+                print("Retrying now...")
+            else:
+                raise e
+
+
 def get(url: str, *args, **kwargs) -> Response:
     """
     Send a GET request with TLS client
@@ -409,6 +461,64 @@ def delete(url: str, *args, **kwargs) -> Response:
     return retry_on_network_error(lambda: _delete(url, *args, **add_redirects(kwargs, False)))
 
 
+"""
+asyncio requests shortcuts
+"""
+
+
+async def aget(url: str, *args, **kwargs) -> Response:
+    """
+    Send a GET request with TLS client without blocking the event loop
+    """
+    add_google_referer_if_given(kwargs)
+    fix_headers(kwargs)
+    return await aretry_on_network_error(
+        lambda: arequest("GET", url, *args, **add_redirects(kwargs, True))
+    )
+
+
+async def aoptions(url: str, *args, **kwargs) -> Response:
+    fix_headers(kwargs)
+    return await aretry_on_network_error(
+        lambda: arequest("OPTIONS", url, *args, **add_redirects(kwargs, False))
+    )
+
+
+async def ahead(url: str, *args, **kwargs) -> Response:
+    fix_headers(kwargs)
+    return await aretry_on_network_error(
+        lambda: arequest("HEAD", url, *args, **add_redirects(kwargs, True))
+    )
+
+
+async def apost(url: str, *args, **kwargs) -> Response:
+    fix_headers(kwargs)
+    return await aretry_on_network_error(
+        lambda: arequest("POST", url, *args, **add_redirects(kwargs, True))
+    )
+
+
+async def aput(url: str, *args, **kwargs) -> Response:
+    fix_headers(kwargs)
+    return await aretry_on_network_error(
+        lambda: arequest("PUT", url, *args, **add_redirects(kwargs, True))
+    )
+
+
+async def apatch(url: str, *args, **kwargs) -> Response:
+    fix_headers(kwargs)
+    return await aretry_on_network_error(
+        lambda: arequest("PATCH", url, *args, **add_redirects(kwargs, True))
+    )
+
+
+async def adelete(url: str, *args, **kwargs) -> Response:
+    fix_headers(kwargs)
+    return await aretry_on_network_error(
+        lambda: arequest("DELETE", url, *args, **add_redirects(kwargs, False))
+    )
+
+
 """
 Asynchronous requests shortcuts
 """
@@ -450,6 +560,40 @@ class FailedResponse:
         return str(self.exception)
 
 
+def _send_isolated(item: tuple[int, TLSRequest]) -> tuple[int, TLSRequest]:
+    index, req = item
+    try:
+        req.send()
+    except Exception as e:
+        # a failed request must not stop the others, raise_exception is handled by the caller
+        req.exception = e
+        req.traceback = traceback.format_exc()
+    return index, req
+
+
+def iter_completed(requests: Iterable[TLSRequest], size: int = BRIDGE_POOL_SIZE):
+    """
+    Sends requests with a sliding window of at most `size` requests in flight and yields
+    (index, request) tuples as the requests complete, in completion order.
+
+    A slow request only holds its own slot of the window. Requests are taken from
+    `requests` as slots free up and completed requests wait for the consumer in a queue
+    of at most `size` items, so memory is bounded by the window even for generators.
+    A failed request has its `exception` set and doesn't affect the others.
+    """
+    size = max(size, 1)
+    pool = Pool(size)
+    yield from pool.imap_unordered(_send_isolated, builtins.enumerate(requests), maxsize=size)
+
+
+def _result(request: TLSRequest, exception_handler: Callable | None):
+    if request.response is not None:
+        return request.response
+    if exception_handler:
+        return exception_handler(request, request.exception)
+    return FailedResponse(request.exception)
+
+
 def map(
     requests: list[TLSRequest],
     size: int | None = None,
@@ -460,51 +604,26 @@ def map(
 
     Parameters:
         requests - a collection of Request objects.
-        size - Specifies the number of requests to make at a time. If None, no throttling occurs.
+        size - Specifies the number of requests in flight at a time. Defaults to the size of
+               the bridge connection pool.
         exception_handler - Callback function, called when exception occurred. Params: Request, Exception
 
     Returns:
-        A list of Response objects.
+        A list of Response objects, in the order of the requests.
     """
 
     requests = list(requests)
-    all_resps: list[Response | None] = []
-
-    if size is None:
-        # set default increment size to the total
-        size = len(requests)
-
-    for inc in range(0, len(requests), size):
-        processed_reqs = []
-        requests_range = requests[inc : min(inc + size, len(requests))]
-        for req in requests_range:
-            # prepare the request & construct sessions
-            if req.session is None:
-                req._build_session()
-            # create a list of ProcessResponse objects
-            processed_reqs.append(
-                req.session.request(req.method, req.url, **req.kwargs, process=False)
-            )
-        try:
-            resps: list[Response | None] = response.ProcessResponsePool(
-                processed_reqs
-            ).execute_pool()
-        except Exception as e:
-            # handle exception for all requests in the pool
-            failed_resp: FailedResponse = FailedResponse(e)  # create a FailedResponse object
-            resps = [failed_resp] * len(requests_range)  # add None for each failed request
-            for req in requests_range:
-                if req.raise_exception:
-                    raise e
-                req.exception = e
-                req.traceback = traceback.format_exc()
-                if exception_handler:
-                    exception_handler(req, e)
-        finally:
-            # close sessions
-            for req in requests_range:
-                req.close_session()
-        all_resps.extend(resps)
+    all_resps: list[Response | FailedResponse | None] = [None] * len(requests)
+
+    for index, req in iter_completed(requests, size or BRIDGE_POOL_SIZE):
+        if req.response is not None:
+            all_resps[index] = req.response
+            continue
+        if req.raise_exception:
+            raise req.exception
+        all_resps[index] = FailedResponse(req.exception)
+        if exception_handler:
+            exception_handler(req, req.exception)
     return all_resps
 
 
@@ -527,22 +646,14 @@ def imap(
     """
     if enumerate:  # send to imap_enum
         return imap_enum(requests, size, exception_handler)
+    return _imap(requests, size, exception_handler)
 
-    def send(r):
-        return r.send()
 
-    pool = Pool(size)
-    for request in pool.imap_unordered(send, requests):
-        if request.response is not None:
-            yield request.response
-        elif exception_handler:
-            ex_result = exception_handler(request, request.exception)
-            if ex_result is not None:
-                yield ex_result
-        else:
-            yield FailedResponse(request.exception)
-
-    pool.join()
+def _imap(requests, size: int, exception_handler: Callable | None):
+    for _, request in iter_completed(requests, size):
+        result = _result(request, exception_handler)
+        if result is not None:
+            yield result
 
 
 def imap_enum(
@@ -557,27 +668,12 @@ def imap_enum(
     Responses are still in arbitrary order.
 
     Parameters:
-        requests - a sequence of Request objects.
+        requests - a generator or sequence of Request objects.
         size - Specifies the number of requests to make at a time. default is 2
         exception_handler - Callback function, called when exception occurred. Params: Request, Exception
 
     Yields:
         (index, Response) tuples.
     """
-
-    def send(r):
-        return r._index, r.send()
-
-    requests = list(requests)
-    for index, req in enumerate(requests):
-        req._index = index
-
-    pool = Pool(size)
-    for index, request in pool.imap_unordered(send, requests):
-        if request.response is not None:
-            yield index, request.response
-        elif exception_handler:
-            ex_result = exception_handler(request, request.exception)
-            yield index, ex_result
-        else:
-            yield index, FailedResponse(request.exception)
+    for index, request in iter_completed(requests, size):
+        yield index, _result(request, exception_handler)
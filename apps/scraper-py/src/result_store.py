@@ -0,0 +1,82 @@
+import asyncio
+import json
+import zlib
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .db_setup import AsyncSession
+from .models import ResultBlob, Task
+
+COMPRESSION_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class EncodedResult:
+    hash: str
+    size: int
+    data: bytes
+
+
+def encode_result(result: Any) -> EncodedResult:
+    raw = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode()
+    return EncodedResult(
+        hash=sha256(raw).hexdigest(),
+        size=len(raw),
+        data=zlib.compress(raw, COMPRESSION_LEVEL),
+    )
+
+
+def decode_result(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data))
+
+
+async def put_results(session: AsyncSession, results: list[Any]) -> list[EncodedResult]:
+    """
+    Store the results in `result_blobs` and return their references in the same order.
+    Identical results are stored once, whichever task they came from. Blobs are never
+    deleted, so that a reference written concurrently can't dangle.
+    """
+    if not results:
+        return []
+    # zlib releases the GIL, large pages don't block the event loop
+    encoded = await asyncio.to_thread(lambda: [encode_result(result) for result in results])
+    rows = {
+        item.hash: {
+            "hash": item.hash,
+            "size": item.size,
+            "compressed_size": len(item.data),
+            "data": item.data,
+        }
+        for item in encoded
+    }
+    # Same order in every transaction, so that concurrent writers of the same blobs don't deadlock
+    values = [rows[result_hash] for result_hash in sorted(rows)]
+    await session.execute(
+        insert(ResultBlob).values(values).on_conflict_do_nothing(index_elements=["hash"])
+    )
+    return encoded
+
+
+async def get_results(session: AsyncSession, hashes) -> dict[str, Any]:
+    hashes = {result_hash for result_hash in hashes if result_hash}
+    if not hashes:
+        return {}
+    rows = (
+        await session.execute(
+            select(ResultBlob.hash, ResultBlob.data).where(ResultBlob.hash.in_(hashes))
+        )
+    ).all()
+    return await asyncio.to_thread(lambda: {row.hash: decode_result(row.data) for row in rows})
+
+
+async def load_task_results(session: AsyncSession, tasks: list[Task]) -> None:
+    """Fill `result` of the given tasks from the store, without marking them as modified."""
+    results = await get_results(session, (task.result_hash for task in tasks))
+    for task in tasks:
+        if task.result_hash in results:
+            set_committed_value(task, "result", results[task.result_hash])
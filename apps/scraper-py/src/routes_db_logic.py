@@ -3,10 +3,12 @@ import json
 from collections import defaultdict
 from datetime import UTC, datetime
 from hashlib import sha256
-from typing import Any
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.attributes import set_committed_value
 
+from .content_cache import content_cache
 from .db_setup import get_async_session
 from .models import (
     Task,
@@ -15,6 +17,7 @@ from .models import (
     serialize_task,
 )
 from .registry import REGISTRY
+from .result_store import get_results, load_task_results, put_results
 from .settings import settings
 from .task_helper import TaskHelper
 from .temporal_client import run_scrape_workflow
@@ -36,16 +39,54 @@ def extract_task_data(json_data):
 
 async def perform_create_tasks(tasks) -> list[str]:
     async with get_async_session() as session:
+        # Results of cache hits go to the result store, the tasks only keep a reference
+        with_results = [task for task in tasks if task.result is not None]
+        results = [task.result for task in with_results]
+        stored = await put_results(session, results)
+        for task, item in zip(with_results, stored, strict=True):
+            task.result = None
+            task.result_hash = item.hash
+            task.result_size = item.size
         session.add_all(tasks)
         await session.commit()
+        for task, result in zip(with_results, results, strict=True):
+            set_committed_value(task, "result", result)
         return serialize(tasks)
 
 
-async def queryTasks(with_results, page=None, per_page=None, serializer=serialize_task):
+# `id` breaks ties between tasks created in the same second
+TASKS_ORDER = (Task.sort_id.desc(), Task.id.desc())
+STREAM_BATCH_SIZE = 500
+# Page size of keyset requests (`after`) that don't set `per_page`
+CURSOR_PAGE_SIZE = 100
+
+
+def encode_cursor(task) -> str:
+    return f"{task.sort_id}:{task.id}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    sort_id, _, task_id = cursor.partition(":")
+    try:
+        return int(sort_id), int(task_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'") from None
+
+
+def select_tasks(with_results: bool):
+    query = select(Task).order_by(*TASKS_ORDER)
+    if not with_results:
+        query = query.options(defer(Task.result))
+    return query
+
+
+async def queryTasks(with_results, page=None, per_page=None, serializer=serialize_task, after=None):
     async with get_async_session() as session:
         total_count = await session.scalar(select(func.count()).select_from(Task))
 
-        if per_page is None:
+        if per_page is None and after:
+            per_page = CURSOR_PAGE_SIZE
+        elif per_page is None:
             per_page = 1 if total_count == 0 else total_count
             page = 1
         else:
@@ -54,29 +95,57 @@ async def queryTasks(with_results, page=None, per_page=None, serializer=serializ
         total_pages = max((total_count + per_page - 1) // per_page, 1)
         page = int(page)
         page = max(min(page, total_pages), 1)
-        tasks_query = select(Task).order_by(Task.sort_id.desc())
-        if per_page is not None:
-            per_page = int(per_page)
-            start = (page - 1) * per_page
-            tasks_query = tasks_query.limit(per_page).offset(start)
+        tasks_query = select_tasks(with_results).limit(per_page)
+        if after:
+            # Keyset pagination, the cost doesn't grow with the page number
+            tasks_query = tasks_query.where(
+                tuple_(Task.sort_id, Task.id) < tuple_(*decode_cursor(after))
+            )
+        else:
+            tasks_query = tasks_query.offset((page - 1) * per_page)
         tasks = (await session.scalars(tasks_query)).all()
+        if with_results:
+            await load_task_results(session, tasks)
         current_page = page if page is not None else 1
-        next_page = current_page + 1 if (current_page * per_page) < total_count else None
-        previous_page = current_page - 1 if current_page > 1 else None
+        if after:
+            next_page, previous_page = None, None
+        else:
+            next_page = current_page + 1 if (current_page * per_page) < total_count else None
+            previous_page = current_page - 1 if current_page > 1 else None
         return {
             "count": total_count,
             "total_pages": total_pages,
             "next": next_page,
             "previous": previous_page,
+            "next_cursor": encode_cursor(tasks[-1]) if len(tasks) == per_page else None,
             "results": [serializer(task, with_results) for task in tasks],
         }
 
 
-async def get_task_from_db(task_id):
+async def count_tasks() -> int:
+    async with get_async_session() as session:
+        return await session.scalar(select(func.count()).select_from(Task))
+
+
+async def stream_tasks(with_results, serializer=serialize_task):
+    """Yield serialized tasks read from a server-side cursor in batches."""
+    async with get_async_session() as session:
+        query = select_tasks(with_results).execution_options(yield_per=STREAM_BATCH_SIZE)
+        result = await session.stream_scalars(query)
+        async for tasks in result.partitions():
+            if with_results:
+                await load_task_results(session, tasks)
+            for task in tasks:
+                yield serializer(task, with_results)
+
+
+async def get_task_from_db(task_id, with_results=True):
     async with get_async_session() as session:
         task = await TaskHelper.get_task(session, task_id)
         if task:
-            return serialize(task)
+            if with_results:
+                await load_task_results(session, [task])
+            return task.to_json(with_results)
         else:
             raise create_task_not_found_error(task_id)
 
@@ -95,14 +164,20 @@ async def execute_async_tasks(json_data):
         for scraper_name, data in scraper_data.items()
     ]
     responses = await asyncio.gather(*tasks)
-    tasks = [item for sublist in responses for item in sublist]
+    tasks = [item for sublist, _ in responses for item in sublist]
+    revalidate_task_ids = [task_id for _, task_ids in responses for task_id in task_ids]
     await run_scrape_workflow(
         [task["id"] for task in tasks if task["status"] != TaskStatus.COMPLETED]
+        + revalidate_task_ids
     )
     return tasks
 
 
-async def create_tasks(scraper, tasks_data):
+async def create_tasks(scraper, tasks_data) -> tuple[list[dict], list[int]]:
+    """
+    Create tasks for the given data, returning the serialized tasks and the ids of
+    the extra tasks created to revalidate stale cached results.
+    """
     scraper_name = scraper["scraper_name"]
 
     all_task_sort_id = int(datetime.now(UTC).timestamp())
@@ -119,51 +194,60 @@ async def create_tasks(scraper, tasks_data):
             cached_key=cached_key,
         )
 
+    def create_completed_task(task_data, cached_key: str, metadata: dict, sort_id: int, result):
+        now = datetime.now()
+        task = create_task(task_data, cached_key, metadata, sort_id)
+        task.status = TaskStatus.COMPLETED
+        task.result = result
+        task.result_count = len(result)
+        task.started_at = now
+        task.finished_at = now
+        return task
+
     def create_cache_key(scraper_name: str, data: dict) -> str:
         return scraper_name + "-" + sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
 
     async def create_cached_tasks():
-        ls: list[dict[str, Any]] = []
-        cache_keys: list[str] = []
-        for t in tasks_data:
-            key = create_cache_key(scraper_name, t["data"])
-            ls.append({"key": key, **t})
-            cache_keys.append(key)
-        cache_map: dict[str, Any] = {}
-        async with get_async_session() as session:
-            query = select(Task).where(
-                Task.cached_key.in_(cache_keys),
-                Task.status.in_([TaskStatus.COMPLETED]),
-            )
-            result = (await session.scalars(query)).all()
-            cache_map = {row.cached_key: row for row in result}
+        cached_contents = await content_cache.get_many(
+            scraper_name, [item["data"] for item in tasks_data]
+        )
         tasks: list[Task] = []
-        cached_tasks: list[Task] = []
-        for idx, item in enumerate(ls):
-            cached_task = cache_map.get(item["key"])
-            if cached_task:
-                sort_id = all_task_sort_id - (idx + 1)
-                cached_tasks.append(cached_task)
-            else:
-                sort_id = all_task_sort_id - (idx + 1)
-                tasks.append(create_task(item["data"], item["key"], item["metadata"], sort_id))
-        return tasks, cached_tasks
+        revalidate_tasks: dict[str, Task] = {}
+        hits = 0
+        for idx, (item, content) in enumerate(zip(tasks_data, cached_contents, strict=True)):
+            key = create_cache_key(scraper_name, item["data"])
+            sort_id = all_task_sort_id - (idx + 1)
+            if content is None:
+                tasks.append(create_task(item["data"], key, item["metadata"], sort_id))
+                continue
+            hits += 1
+            tasks.append(
+                create_completed_task(item["data"], key, item["metadata"], sort_id, content.result)
+            )
+            if content.is_stale and key not in revalidate_tasks:
+                # Serve the stale result right away and refresh it in the background
+                revalidate_tasks[key] = create_task(
+                    item["data"], key, {**item["metadata"], "revalidate": True}, sort_id
+                )
+        return tasks, list(revalidate_tasks.values()), hits
 
     if settings.cache_enabled:
-        tasks, cached_tasks = await create_cached_tasks()
-        tasks = (await perform_create_tasks(tasks) if tasks else []) + [
-            serialize(cached_task) for cached_task in cached_tasks
-        ]
+        tasks, revalidate_tasks, hits = await create_cached_tasks()
     else:
-        tasks, cached_tasks = [], []
+        tasks, revalidate_tasks, hits = [], [], 0
         for idx, task_data in enumerate(tasks_data):
             sort_id = all_task_sort_id - (idx + 1)
-            tasks.append(create_task(task_data, "", sort_id))
-        tasks = await perform_create_tasks(tasks)
+            tasks.append(create_task(task_data["data"], "", task_data["metadata"], sort_id))
 
-    if cached_tasks:
-        print(f"{len(cached_tasks)} out of {len(tasks)} results are from cache")
-    return tasks
+    created = await perform_create_tasks(tasks + revalidate_tasks)
+    tasks = created[: len(tasks)]
+    revalidate_task_ids = [task["id"] for task in created[len(tasks) :]]
+
+    if hits:
+        print(f"{hits} out of {len(tasks)} results are from cache")
+    if revalidate_task_ids:
+        print(f"Revalidating {len(revalidate_task_ids)} stale cached results")
+    return tasks, revalidate_task_ids
 
 
 def create_page_url(page, per_page, with_results):
@@ -182,11 +266,12 @@ async def execute_get_tasks(query_params):
     with_results = query_params.get("with_results", "true").lower() == "true"
     page = query_params.get("page")
     per_page = query_params.get("per_page")
+    after = query_params.get("after")
 
     page = int(page) if page is not None else 1
     per_page = int(per_page) if per_page is not None else None
 
-    return await queryTasks(with_results, page, per_page)
+    return await queryTasks(with_results, page, per_page, after=after)
 
 
 async def perform_get_task_results(task_id):
@@ -214,12 +299,10 @@ async def execute_get_task_results(task_id):
     }
 
 
-async def perform_get_tasks_results(task_ids):
+async def stream_tasks_results(task_ids):
     async with get_async_session() as session:
-        tasks = await TaskHelper.get_tasks_with_entities(
-            session,
-            task_ids,
-            [
+        query = (
+            select(
                 Task.id,
                 Task.scraper_name,
                 Task.result_count,
@@ -227,20 +310,24 @@ async def perform_get_tasks_results(task_ids):
                 Task.updated_at,
                 Task.status,
                 Task.result,
-            ],
+                Task.result_hash,
+            )
+            .where(Task.id.in_(task_ids))
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
         )
-        return [
-            {
-                "scraper_name": task.scraper_name,
-                "task_data": task.data,
-                "result_count": task.result_count,
-                "task_id": task.id,
-                "status": task.status,
-                "updated_at": isoformat(task.updated_at),
-                "results": task.result,
-            }
-            for task in tasks
-        ]
+        result = await session.stream(query)
+        async for tasks in result.partitions():
+            stored = await get_results(session, (task.result_hash for task in tasks))
+            for task in tasks:
+                yield {
+                    "scraper_name": task.scraper_name,
+                    "task_data": task.data,
+                    "result_count": task.result_count,
+                    "task_id": task.id,
+                    "status": task.status,
+                    "updated_at": isoformat(task.updated_at),
+                    "results": stored.get(task.result_hash, task.result),
+                }
 
 
 async def perform_patch_task(action, task_id):
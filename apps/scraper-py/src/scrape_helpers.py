@@ -1,11 +1,10 @@
 import re
-import time
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
 from hrequests.browser import BrowserSession
 
-from .utils import convert_to_markdown
+from .utils import ParsedPage, convert_to_markdown, parse_page
 
 load_dotenv()
 
@@ -35,7 +34,7 @@ def accept_all_cookies(page: BrowserSession, *, domain: str):
         if ACCEPT_RE.search(txt):
             print(f"Accepting cookies for {domain}")
             el.click()
-            time.sleep(3)
+            page.awaitReady(timeout=3)
             break
 
 
@@ -46,9 +45,12 @@ def check_press_and_hold(page: BrowserSession):
     return None
 
 
+def is_bot_detected(parsed: ParsedPage) -> bool:
+    return bool(CHECK_BOT_RE.search(parsed.markdown)) or parsed.has_challenge_iframe
+
+
 def check_bot_is_detected(page: BrowserSession):
-    md = convert_to_markdown(page.content)
-    return CHECK_BOT_RE.search(md) or check_press_and_hold(page)
+    return is_bot_detected(parse_page(page.content))
 
 
 def check_captcha(page: BrowserSession, *, domain: str):
@@ -59,3 +61,18 @@ def check_captcha(page: BrowserSession, *, domain: str):
 domain_handlers = {
     "finance.yahoo.com": [accept_all_cookies],
 }
+
+# Resource blocking profile (see `browsers.blocking.BLOCKING_PROFILES`) by domain,
+# also applies to subdomains
+domain_blocking_profiles = {
+    # the cookie dialog needs its styles to be clickable
+    "finance.yahoo.com": "images",
+}
+
+# Page readiness rules (see `browsers.readiness.ReadinessRule`) by domain, also apply
+# to subdomains, e.g. {"example.com": {"selector": "article", "network_idle_ms": 3000}}
+domain_readiness_rules: dict[str, dict] = {}
+
+# Scheduling limits (see `domain_scheduler.DomainLimits`) by domain, also apply to
+# subdomains, e.g. {"example.com": {"concurrency": 1, "min_interval_sec": 5}}
+domain_limits: dict[str, dict] = {}
@@ -1,20 +1,23 @@
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from time import monotonic
 from urllib.parse import urlparse
 
-from hrequests import BrowserSession
-
-from .browsers import get_session
+from .browsers import browser_pool
+from .conversion import conversion_executor
+from .domain_scheduler import domain_scheduler
+from .escalation import EscalationTier, RetryBudget, escalation_strategy
 from .exceptions import BotDetectedException
-from .scrape_helpers import check_bot_is_detected, domain_handlers
-from .utils import convert_to_markdown
+from .scrape_helpers import domain_handlers, is_bot_detected
+from .settings import settings
 
 
 @dataclass
 class ScrapeResult:
     url: str
     markdown: str
+    # The page was over CONVERSION_MAX_HTML_BYTES and only its beginning was converted
+    truncated: bool = False
 
 
 @dataclass
@@ -27,20 +30,51 @@ class ScraperConfig:
 
 
 def scrape_md(
-    *, config: ScraperConfig, retry_attempt: int = 0, on_heartbeat: Callable | None = lambda: None
+    *, config: ScraperConfig, on_heartbeat: Callable | None = lambda: None
 ) -> ScrapeResult:
-    page: BrowserSession = None
-    try:
-        if on_heartbeat:
-            on_heartbeat()
-
-        print(f"Scraping {config.url}")
-        time = monotonic()
-
-        domain = urlparse(config.url).netloc.replace("www.", "")
-        page = get_session(use_proxy=config.use_proxy, use_cdp=config.use_cdp)
-
+    """
+    Scrape a page as markdown, escalating from a direct browser to a proxy and to CDP
+    on failures within the retry budget, see `escalation.EscalationStrategy`.
+    """
+
+    def attempt(tier: EscalationTier) -> ScrapeResult:
+        try:
+            result = _scrape_md_once(
+                config=replace(config, use_proxy=tier.use_proxy, use_cdp=tier.use_cdp),
+                on_heartbeat=on_heartbeat,
+            )
+        except BotDetectedException:
+            domain_scheduler.record_outcome(config.url, bot_detected=True)
+            raise
+        domain_scheduler.record_outcome(config.url, bot_detected=False)
+        return result
+
+    return escalation_strategy.run(
+        config.url,
+        attempt,
+        budget=RetryBudget(
+            max_attempts=config.max_retry + 1,
+            max_seconds=settings.scrape_time_budget_sec,
+            max_cost=settings.scrape_cost_budget,
+            attempt_sec=settings.scrape_attempt_estimate_sec,
+        ),
+        min_tier=escalation_strategy.tier_index(use_proxy=config.use_proxy, use_cdp=config.use_cdp),
+        on_heartbeat=on_heartbeat,
+    )
+
+
+def _scrape_md_once(*, config: ScraperConfig, on_heartbeat: Callable | None) -> ScrapeResult:
+    if on_heartbeat:
+        on_heartbeat()
+
+    print(f"Scraping {config.url}")
+    time = monotonic()
+
+    domain = urlparse(config.url).netloc.replace("www.", "")
+    with browser_pool.lease(use_proxy=config.use_proxy, use_cdp=config.use_cdp) as page:
         page.goto(config.url, wait_until="domcontentloaded")
+        ready = page.awaitReady()
+        print(f"{config.url} is ready in {round(ready.elapsed_ms)} ms ({ready.reason})")
         url = page.evaluate("window.location.href;")
 
         if on_heartbeat:
@@ -54,43 +88,24 @@ def scrape_md(
         if on_heartbeat:
             on_heartbeat()
 
-        markdown = convert_to_markdown(page.content, remove_ul=config.remove_ul)
+        print(f"{config.url}: {page.blocker.stats.summary()}")
+
+        parsed = conversion_executor.convert(page.content, remove_ul=config.remove_ul)
+        markdown = parsed.markdown
 
         print(markdown)
 
-        if check_bot_is_detected(page) or len(markdown) <= 100:
-            page.close()
+        # Raising inside the lease discards the session instead of returning it to the pool
+        if is_bot_detected(parsed) or len(markdown) <= 100:
             raise BotDetectedException(config.url)
 
-        page.close()
-
-        print(f"{config.url} is scraped successfully in {round(monotonic() - time, 2)} seconds")
-
-        return ScrapeResult(
-            url=url,
-            markdown=markdown,
-        )
-
-    except Exception as e:
-        if retry_attempt >= config.max_retry:
-            raise e
-
-        print(f"Failed to scrape with error: {e}, retrying...")
-
-        is_bot_detected = isinstance(e, BotDetectedException)
-        use_proxy = is_bot_detected
-
-        use_cdp = config.use_cdp or (retry_attempt >= 3 and config.use_proxy and is_bot_detected)
+    print(f"{config.url} is scraped successfully in {round(monotonic() - time, 2)} seconds")
 
-        return scrape_md(
-            config=ScraperConfig(
-                url=config.url,
-                use_proxy=use_proxy,
-                use_cdp=use_cdp,
-            ),
-            retry_attempt=retry_attempt + 1,
-            on_heartbeat=on_heartbeat,
-        )
+    return ScrapeResult(
+        url=url,
+        markdown=markdown,
+        truncated=parsed.truncated,
+    )
 
 
 SCRAPERS_REGISTRY = {
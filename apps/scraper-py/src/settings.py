@@ -20,7 +20,30 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("POSTGRES_URL", "DB_URL"),
     )
 
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    db_slow_acquire_sec: float = Field(default=1.0, alias="DB_SLOW_ACQUIRE_SEC")
+
+    completion_flush_interval_ms: int = Field(default=200, alias="COMPLETION_FLUSH_INTERVAL_MS")
+    completion_max_batch: int = Field(default=50, alias="COMPLETION_MAX_BATCH")
+
     cache_enabled: bool = Field(default=True, alias="CACHE")
+    # "redis", "disk" or "off", Redis is used by default when REDIS_URL is set,
+    # otherwise the cache is off
+    content_cache_backend: str | None = Field(default=None, alias="CONTENT_CACHE_BACKEND")
+    content_cache_dir: str = Field(default=".cache/content", alias="CONTENT_CACHE_DIR")
+    content_cache_max_bytes: int = Field(
+        default=1024 * 1024 * 1024, alias="CONTENT_CACHE_MAX_BYTES"
+    )
+    content_cache_ttl_sec: float = Field(default=24 * 3600, alias="CONTENT_CACHE_TTL_SEC")
+    content_cache_stale_sec: float = Field(default=3600, alias="CONTENT_CACHE_STALE_SEC")
+    # JSON object of domain to TTL in seconds, e.g. {"news.ycombinator.com": 300}
+    content_cache_domain_ttls: dict[str, float] = Field(
+        default_factory=dict, alias="CONTENT_CACHE_DOMAIN_TTLS"
+    )
 
     proxy_url: str | None = Field(default=None, alias="PROXY_URL")
 
@@ -29,9 +52,64 @@ class Settings(BaseSettings):
     temporal_api_key: str | None = Field(default=None, alias="TEMPORAL_API_KEY")
     temporal_tls: bool = Field(default=False, alias="TEMPORAL_TLS")
 
+    # Tasks per `run_scraper_batch` activity, 1 runs one activity per task
+    scrape_batch_size: int = Field(default=1, alias="SCRAPE_BATCH_SIZE")
+    scrape_batch_concurrency: int = Field(default=5, alias="SCRAPE_BATCH_CONCURRENCY")
+
     redis_url: str | None = Field(default=None, alias="REDIS_URL")
 
     cdp_url: str | None = Field(default=None, alias="CDP_URL")
+    # Browser contexts open at a time on the shared CDP connection
+    cdp_max_contexts: int = Field(default=8, alias="CDP_MAX_CONTEXTS")
+
+    sitemap_concurrency: int = Field(default=8, alias="SITEMAP_CONCURRENCY")
+    sitemap_host_rate: float = Field(default=5, alias="SITEMAP_HOST_RATE")
+    sitemap_host_burst: int = Field(default=10, alias="SITEMAP_HOST_BURST")
+    sitemap_max_depth: int = Field(default=5, alias="SITEMAP_MAX_DEPTH")
+    sitemap_max_urls: int = Field(default=10_000, alias="SITEMAP_MAX_URLS")
+
+    # Resource blocking profiles, see `browsers.blocking.BLOCKING_PROFILES`,
+    # any profile but "off" turns the browser's HTTP cache off
+    browser_blocking_profile: str = Field(default="text", alias="BROWSER_BLOCKING_PROFILE")
+    cdp_blocking_profile: str = Field(default="strict", alias="CDP_BLOCKING_PROFILE")
+
+    # Page readiness, see `browsers.readiness`
+    ready_timeout: float = Field(default=15, alias="READY_TIMEOUT")
+    ready_quiet_ms: int = Field(default=500, alias="READY_QUIET_MS")
+    # 0 disables the network idle wait unless a domain rule sets it
+    ready_network_idle_ms: int = Field(default=0, alias="READY_NETWORK_IDLE_MS")
+    ready_min_text_length: int = Field(default=200, alias="READY_MIN_TEXT_LENGTH")
+
+    # Retry budget of a scrape across the direct, proxy and CDP tiers, see `escalation`
+    scrape_time_budget_sec: float = Field(default=240, alias="SCRAPE_TIME_BUDGET_SEC")
+    scrape_cost_budget: float = Field(default=12, alias="SCRAPE_COST_BUDGET")
+    # Time kept in the budget for the next attempt, the activity times out at 300s
+    scrape_attempt_estimate_sec: float = Field(default=45, alias="SCRAPE_ATTEMPT_ESTIMATE_SEC")
+    scrape_backoff_base_sec: float = Field(default=1, alias="SCRAPE_BACKOFF_BASE_SEC")
+    scrape_backoff_max_sec: float = Field(default=10, alias="SCRAPE_BACKOFF_MAX_SEC")
+    scrape_tier_memory_ttl_sec: float = Field(default=6 * 3600, alias="SCRAPE_TIER_MEMORY_TTL_SEC")
+
+    # Default per-domain limits of the scrape tasks, see `domain_scheduler`
+    domain_concurrency: int = Field(default=2, alias="DOMAIN_CONCURRENCY")
+    domain_min_interval_sec: float = Field(default=1, alias="DOMAIN_MIN_INTERVAL_SEC")
+
+    # An IN_PROGRESS task started this long ago is presumed dead and may be claimed again
+    task_claim_stale_sec: float = Field(default=900, alias="TASK_CLAIM_STALE_SEC")
+    # Pull mode, see `task_puller`
+    task_pull_batch_size: int = Field(default=10, alias="TASK_PULL_BATCH_SIZE")
+    task_pull_concurrency: int = Field(default=5, alias="TASK_PULL_CONCURRENCY")
+    task_pull_idle_sec: float = Field(default=2, alias="TASK_PULL_IDLE_SEC")
+
+    browser_pool_min_size: int = Field(default=1, alias="BROWSER_POOL_MIN_SIZE")
+    browser_pool_max_size: int = Field(default=5, alias="BROWSER_POOL_MAX_SIZE")
+    browser_pool_idle_timeout: float = Field(default=300, alias="BROWSER_POOL_IDLE_TIMEOUT")
+    browser_pool_max_pages: int = Field(default=50, alias="BROWSER_POOL_MAX_PAGES")
+
+    conversion_workers: int = Field(default=2, alias="CONVERSION_WORKERS")
+    conversion_max_pending: int = Field(default=16, alias="CONVERSION_MAX_PENDING")
+    conversion_max_html_bytes: int = Field(
+        default=20 * 1024 * 1024, alias="CONVERSION_MAX_HTML_BYTES"
+    )
 
     @property
     def temporal(self) -> TemporalSettings:
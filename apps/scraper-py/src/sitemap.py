@@ -8,25 +8,36 @@ from .links import (
     extract_link_upto_nth_segment,
 )
 from .requests.request import Request
+from .sitemap_crawler import SitemapCrawler, get_host_bucket
 from .sitemap_parser_utils import (
-    SitemapUrl,
     clean_robots_txt_url,
     clean_sitemap_url,
     extract_sitemaps,
     fix_bad_sitemap_response,
     fix_gzip_response,
     is_empty_path,
-    split_into_links_and_sitemaps,
-    wrap_in_sitemap,
+    iter_sitemap_links,
+    read_sitemap_response,
 )
 
 
 async def fetch_content(req: Request, url: str, max_retries: int = 3):
     """Fetch content from a URL, handling gzip if necessary."""
+    return await _fetch(req, url, fix_gzip_response, max_retries)
+
+
+async def fetch_raw_content(req: Request, url: str, max_retries: int = 3) -> bytes | None:
+    """Fetch the raw body of a URL, gzipped sitemaps are left compressed for streaming parsing."""
+    return await _fetch(req, url, read_sitemap_response, max_retries)
+
+
+async def _fetch(req: Request, url: str, read_response, max_retries: int):
     for attempt in range(max_retries):
+        # Retries take a token too, so a failing host isn't hit faster than its rate
+        await get_host_bucket(url).acquire()
         try:
-            response = await asyncio.to_thread(req.get, url, timeout=300)
-            return fix_gzip_response(url, response)
+            response = await req.aget(url, timeout=300)
+            return read_response(url, response)
         except Exception:
             if attempt == max_retries - 1:
                 raise
@@ -70,15 +81,7 @@ class Sitemap(_Base):
     ) -> list[str]:
         request_options = self._create_request_options()
 
-        urls = await self._get_urls(request_options, self.urls)
-        urls = [
-            url["loc"]
-            for url in urls
-            if (
-                (since and url["lastmod"] and url["lastmod"] >= since or not since)
-                and (to and url["lastmod"] and url["lastmod"] <= to or not to)
-            )
-        ]
+        urls = await self._get_urls(request_options, self.urls, since=since, to=to)
         result = apply_filters_maps_sorts_randomize(
             urls,
             self._filters.get(0, []),
@@ -103,37 +106,21 @@ class Sitemap(_Base):
         return options
 
     async def _get_sitemaps_urls(self, request_options, urls):
-        visited = set()
-
-        async def sitemap_func(req, data):
-            nonlocal visited
-
-            url = data.get("url")
-            if url in visited:
-                return []
+        req = Request(**request_options)
 
-            visited.add(url)
+        async def visit(url, level):
             print(f"Visiting sitemap {url}")
-            content = fix_bad_sitemap_response(await fetch_content(req, url))
+            content = await fetch_raw_content(req, url)
             if not content:
-                return []
+                return None
 
-            urls = extract_sitemaps(content)
-            level = data.get("level", 0)
-            result = apply_filters_maps_sorts_randomize(
+            urls = await asyncio.to_thread(extract_sitemaps, content)
+            return apply_filters_maps_sorts_randomize(
                 [url["loc"] for url in urls],
                 self._filters.get(level, []),
             )
-            child_sitemaps = await asyncio.gather(
-                *[sitemap_func(req, data) for data in wrap_in_sitemap(result, level=level + 1)]
-            )
-            return ([url] + flatten(child_sitemaps)) if result else [url]
 
-        req = Request(**request_options)
-        result = await asyncio.gather(
-            *[sitemap_func(req, data) for data in wrap_in_sitemap(urls, level=1)]
-        )
-        return flatten(result)
+        return await SitemapCrawler().crawl(urls, visit, level=1)
 
     async def _get_sitemaps_from_robots(self, request_options, urls):
         visited: set[str] = set()
@@ -178,23 +165,25 @@ class Sitemap(_Base):
 
         return result
 
-    async def _get_urls(self, request_options, urls) -> list[SitemapUrl]:
-        visited = set()
+    async def _get_urls(self, request_options, urls, since=None, to=None) -> list[str]:
+        filters = self._filters.get(0, [])
+        links: list[str] = []
 
-        async def sitemap_func(req, url):
-            nonlocal visited
+        def passes_filters(url: str) -> bool:
+            return all(filter_info["function"](url) for filter_info in filters)
 
-            if url in visited:
-                return []
+        def parse_links(content: bytes) -> list[str]:
+            # Links are filtered while the shard is parsed, so only matching ones are kept
+            matching = iter_sitemap_links(content, since=since, to=to, predicate=passes_filters)
+            return [link["loc"] for link in matching]
 
-            visited.add(url)
+        async def visit(url, level):
             print(f"Extracting links from {url}")
-            content = fix_bad_sitemap_response(await fetch_content(req, url))
-
-            links, locs = split_into_links_and_sitemaps(content)
-
-            return links
+            content = await fetch_raw_content(req, url)
+            if content:
+                links.extend(await asyncio.to_thread(parse_links, content))
+            return []
 
         req = Request(**request_options)
-        result = await asyncio.gather(*[sitemap_func(req, url) for url in urls])
-        return flatten(result)
+        await SitemapCrawler(max_urls=len(urls)).crawl(urls, visit)
+        return links
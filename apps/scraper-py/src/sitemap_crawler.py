@@ -0,0 +1,142 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from time import monotonic
+from urllib.parse import urlparse
+
+from .settings import settings
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second with bursts of up to `burst` requests.
+    Tokens can go negative, which queues callers in the order they asked for a token.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at = monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# max number of host buckets kept, the least recently used ones are dropped
+HOST_BUCKETS_MAX = 1024
+
+# Shared by all crawls in the process so that concurrent crawls of a host
+# don't add up to more than the host's rate
+_host_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+_host_buckets_lock = threading.Lock()
+
+
+def get_host_bucket(url: str) -> TokenBucket:
+    host = urlparse(url).netloc.lower()
+    with _host_buckets_lock:
+        if host not in _host_buckets:
+            _host_buckets[host] = TokenBucket(
+                settings.sitemap_host_rate, settings.sitemap_host_burst
+            )
+        _host_buckets.move_to_end(host)
+        while len(_host_buckets) > HOST_BUCKETS_MAX:
+            _host_buckets.popitem(last=False)
+        return _host_buckets[host]
+
+
+class SitemapCrawler:
+    """
+    Visits a tree of sitemaps with at most `concurrency` visits at a time, shallower
+    sitemaps first. Visits are expected to rate limit their requests with `get_host_bucket`.
+
+    A URL is visited once per crawl even if several sitemaps link to it. URLs deeper than
+    `max_depth` levels below the roots or beyond the first `max_urls` are skipped.
+    A failed visit is logged and doesn't stop the crawl.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int | None = None,
+        max_depth: int | None = None,
+        max_urls: int | None = None,
+    ) -> None:
+        self.concurrency = max(concurrency or settings.sitemap_concurrency, 1)
+        self.max_depth = settings.sitemap_max_depth if max_depth is None else max_depth
+        self.max_urls = settings.sitemap_max_urls if max_urls is None else max_urls
+
+    async def crawl(
+        self,
+        urls: list[str],
+        visit: Callable[[str, int], Awaitable[list[str] | None]],
+        level: int = 0,
+    ) -> list[str]:
+        """
+        Crawl from `urls` at `level`, `visit(url, level)` returns the child URLs to crawl
+        at the next level, or None if the URL couldn't be fetched. Returns the successfully
+        visited URLs.
+        """
+        queue: asyncio.PriorityQueue[tuple[int, int, str]] = asyncio.PriorityQueue()
+        seen: set[str] = set()
+        visited: list[str] = []
+        skipped = 0
+
+        def enqueue(url: str, url_level: int) -> None:
+            nonlocal skipped
+            url = url.strip()
+            if not url or url in seen:
+                return
+            if url_level - level > self.max_depth or len(seen) >= self.max_urls:
+                skipped += 1
+                return
+            seen.add(url)
+            queue.put_nowait((url_level, len(seen), url))
+
+        async def worker() -> None:
+            while True:
+                url_level, _, url = await queue.get()
+                try:
+                    children = await visit(url, url_level)
+                    if children is None:
+                        continue
+                    visited.append(url)
+                    for child in children:
+                        enqueue(child, url_level + 1)
+                except Exception as e:
+                    print(f"Failed to visit sitemap {url}: {e}")
+                finally:
+                    queue.task_done()
+
+        for url in urls:
+            enqueue(url, level)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if skipped:
+            print(
+                f"Skipped {skipped} sitemap URLs over the depth ({self.max_depth}) "
+                f"or URL ({self.max_urls}) limits"
+            )
+        return visited
@@ -1,9 +1,11 @@
-from datetime import datetime
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from datetime import UTC, date, datetime
 from gzip import decompress
 from typing import TypedDict
 from urllib.parse import unquote_plus, urlparse
 
-from bs4 import BeautifulSoup
+from lxml import etree
 
 from .links import extract_link_upto_nth_segment
 
@@ -70,42 +72,168 @@ class SitemapUrl(TypedDict):
     lastmod: datetime | None
 
 
+GZIP_MAGIC = b"\x1f\x8b"
+PARSE_CHUNK_BYTES = 64 * 1024
+
+
+def read_sitemap_response(url, response) -> bytes | None:
+    """Like `fix_gzip_response`, but returns the raw (possibly gzipped) body as bytes."""
+    if response.status_code == 404:
+        print("Sitemap not found (404) at the following URL: " + response.url)
+        return None
+    response.raise_for_status()
+    return response.content
+
+
+def parse_lastmod(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        # W3C datetime also allows a bare year or year-month
+        parts = [int(part) for part in value.split("-")]
+        return datetime.combine(date(*parts, *[1] * (3 - len(parts))), datetime.min.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+def is_in_window(lastmod: datetime | None, since: datetime | None, to: datetime | None) -> bool:
+    # Links without lastmod are only kept when there is no window
+    if not since and not to:
+        return True
+    if lastmod is None:
+        return False
+    lastmod = _as_utc(lastmod)
+    return (not since or lastmod >= _as_utc(since)) and (not to or lastmod <= _as_utc(to))
+
+
+def iter_xml_chunks(data: bytes | str, chunk_size: int = PARSE_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Yield the XML document in `data` in chunks, gunzipping it on the fly when it's gzipped,
+    so that the whole decompressed document is never held in memory.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    view = memoryview(data)
+    chunks = (view[offset : offset + chunk_size] for offset in range(0, len(view), chunk_size))
+    if data[:2] == GZIP_MAGIC:
+        chunks = _gunzip(chunks)
+    # Some servers send junk before the document, skip everything up to the first tag
+    started = False
+    for chunk in chunks:
+        if not started:
+            start = bytes(chunk).find(b"<")
+            if start == -1:
+                continue
+            chunk, started = chunk[start:], True
+        yield bytes(chunk)
+
+
+def _gunzip(chunks: Iterable[bytes | memoryview]) -> Iterator[bytes]:
+    # Like gzip.decompress, reads every member of concatenated gzip files
+    # and ignores the zero padding after the last one
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    at_member_start = True
+    for chunk in chunks:
+        while chunk:
+            if at_member_start:
+                chunk = bytes(chunk).lstrip(b"\x00")
+                if not chunk:
+                    break
+                at_member_start = False
+            try:
+                yield decompressor.decompress(chunk)
+            except zlib.error as ex:
+                raise GunzipException(
+                    f"Decompression failed. Error during gunzipping: {ex}"
+                ) from ex
+            if not decompressor.eof:
+                break
+            chunk = decompressor.unused_data
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            at_member_start = True
+    yield decompressor.flush()
+
+
+def _local_name(tag) -> str | None:
+    return tag.rpartition("}")[2] if isinstance(tag, str) else None
+
+
+def iter_sitemap_entries(chunks: Iterable[bytes]) -> Iterator[tuple[str, SitemapUrl]]:
+    """
+    Incrementally parse a sitemap or sitemap index and yield `("url" | "sitemap", SitemapUrl)`
+    for every entry. Parsed entries are dropped from the tree right away, so memory use
+    doesn't depend on the number of entries.
+    """
+    parser = etree.XMLPullParser(
+        events=("end",),
+        recover=True,
+        huge_tree=True,
+        resolve_entities=False,
+        no_network=True,
+    )
+
+    def read_entries():
+        for _, elem in parser.read_events():
+            kind = _local_name(elem.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in elem:
+                name = _local_name(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = child.text
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+            if loc:
+                yield kind, {"loc": loc, "lastmod": parse_lastmod(lastmod)}
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from read_entries()
+    parser.close()
+    yield from read_entries()
+
+
+def iter_sitemap_links(
+    data: bytes | str,
+    since: datetime | None = None,
+    to: datetime | None = None,
+    predicate: Callable[[str], bool] | None = None,
+) -> Iterator[SitemapUrl]:
+    """Yield the page links of a sitemap that are within the since/to window."""
+    for kind, entry in iter_sitemap_entries(iter_xml_chunks(data)):
+        if (
+            kind == "url"
+            and is_in_window(entry["lastmod"], since, to)
+            and (predicate is None or predicate(entry["loc"]))
+        ):
+            yield entry
+
+
 def extract_sitemaps(content) -> list[SitemapUrl]:
-    root = BeautifulSoup(content, "lxml-xml")
-    locs = []
-    for sm in root.select("sitemap"):
-        loc = sm.select_one("loc")
-        lastmod = sm.select_one("lastmod")
-        if loc is not None:
-            locs.append(
-                {
-                    "loc": loc.text.strip(),
-                    "lastmod": (datetime.fromisoformat(lastmod.text.strip()) if lastmod else None),
-                }
-            )
-    return locs
+    return [
+        entry for kind, entry in iter_sitemap_entries(iter_xml_chunks(content)) if kind == "sitemap"
+    ]
 
 
 def split_into_links_and_sitemaps(content) -> tuple[list[SitemapUrl], list[SitemapUrl]]:
-    root = BeautifulSoup(content, "lxml-xml")
-
-    def parse_links(elem_name: str):
-        links: list[SitemapUrl] = []
-        for entry in root.select(elem_name):
-            loc = entry.select_one("loc")
-            lastmod = entry.select_one("lastmod")
-            if loc is not None:
-                links.append(
-                    {
-                        "loc": loc.text.strip(),
-                        "lastmod": (
-                            datetime.fromisoformat(lastmod.text.strip()) if lastmod else None
-                        ),
-                    }
-                )
-        return links
-
-    return parse_links("url"), parse_links("sitemap")
+    links: list[SitemapUrl] = []
+    sitemaps: list[SitemapUrl] = []
+    for kind, entry in iter_sitemap_entries(iter_xml_chunks(content)):
+        (links if kind == "url" else sitemaps).append(entry)
+    return links, sitemaps
 
 
 def clean_robots_txt_url(url):
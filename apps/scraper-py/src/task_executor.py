@@ -1,66 +1,126 @@
 import asyncio
 import traceback
+import weakref
 from collections.abc import Callable
 from dataclasses import asdict, is_dataclass
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, and_, bindparam, case, or_, select, update
+from sqlalchemy import case, update
 
+from .completion_writer import CompletionWriter
+from .content_cache import content_cache
 from .db_setup import get_async_session
+from .domain_scheduler import domain_scheduler
 from .models import Task, TaskStatus
 from .registry import REGISTRY
+from .result_store import EncodedResult, put_results
 from .scrapers import ScraperConfig
-from .task_helper import db_retry
+from .settings import settings
+from .task_helper import TaskHelper, db_retry
 
 
 class TaskExecutor:
-    async def process_tasks(self, task_ids: list[int], on_heartbeat: Callable | None = None):
+    def __init__(self) -> None:
+        self._writers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CompletionWriter] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get_completion_writer(self) -> CompletionWriter:
+        loop = asyncio.get_running_loop()
+        if loop not in self._writers:
+            self._writers[loop] = CompletionWriter(
+                write_successes=self.mark_tasks_as_success,
+                write_failures=self.mark_tasks_as_failure,
+                flush_interval_ms=settings.completion_flush_interval_ms,
+                max_batch=settings.completion_max_batch,
+            )
+        return self._writers[loop]
+
+    async def process_tasks(
+        self,
+        task_ids: list[int],
+        on_heartbeat: Callable | None = None,
+        concurrency: int | None = None,
+        reclaim_after_sec: float | None = None,
+    ) -> dict[int, str | None]:
+        """
+        Claim and run the given tasks and return the error log of each processed task
+        (None on success). Tasks that aren't PENDING, or that another worker claimed, are
+        skipped, unless they are IN_PROGRESS for more than `reclaim_after_sec`.
+        At most `concurrency` tasks are scraped at the same time, all of them by default.
+        """
+        return await self._claim_and_run(
+            task_ids=task_ids,
+            reclaim_after_sec=reclaim_after_sec,
+            on_heartbeat=on_heartbeat,
+            concurrency=concurrency,
+        )
+
+    async def process_pending(
+        self,
+        limit: int,
+        on_heartbeat: Callable | None = None,
+        concurrency: int | None = None,
+    ) -> dict[int, str | None]:
+        """
+        Claim up to `limit` of the most urgent PENDING tasks, or stale IN_PROGRESS ones,
+        and run them like `process_tasks`. Replicas can call it in a loop to pull work
+        straight from the database. Only tasks of the registered scrapers are claimed.
+        """
+        return await self._claim_and_run(
+            limit=limit,
+            reclaim_after_sec=settings.task_claim_stale_sec,
+            only_valid_scrapers=True,
+            on_heartbeat=on_heartbeat,
+            concurrency=concurrency,
+        )
+
+    async def _claim_and_run(
+        self,
+        *,
+        task_ids: list[int] | None = None,
+        limit: int | None = None,
+        reclaim_after_sec: float | None = None,
+        only_valid_scrapers: bool = False,
+        on_heartbeat: Callable | None = None,
+        concurrency: int | None = None,
+    ) -> dict[int, str | None]:
+        valid_scraper_names = REGISTRY.get_scrapers_names()
+        valid_scraper_names_set = set(valid_scraper_names)
+
         tasks_json: list[dict[str, Any]] = []
         async with get_async_session() as session:
-            stmt = (
-                select(Task)
-                .where(Task.id.in_(task_ids))
-                .order_by(
-                    Task.sort_id.desc(),
-                    Task.is_sync.desc(),
-                )
+            tasks = await TaskHelper.claim_tasks(
+                session,
+                task_ids=task_ids,
+                limit=limit,
+                reclaim_after_sec=reclaim_after_sec,
+                scraper_names=valid_scraper_names if only_valid_scrapers else None,
             )
-            tasks = (await session.scalars(stmt)).all()
             if not tasks:
-                return
-
-            valid_scraper_names = REGISTRY.get_scrapers_names()
-            valid_scraper_names_set = set(valid_scraper_names)
+                return {}
 
             for task in tasks:
                 if task.scraper_name not in valid_scraper_names_set:
+                    # rolls back the claim
                     raise Exception(
                         f"Invalid scraper '{task.scraper_name}'. "
                         f"Valid: {', '.join(valid_scraper_names)}"
                     )
 
-            task_ids = [task.id for task in tasks]
             parent_ids = list({task.parent_task_id for task in tasks if task.parent_task_id})
-            await session.execute(
-                update(Task)
-                .where(
-                    or_(
-                        Task.id.in_(task_ids),
-                        and_(
-                            Task.id.in_(parent_ids),
-                            Task.started_at.is_(None),
-                        ),
-                    ),
-                )
-                .values(
-                    {
-                        "status": TaskStatus.IN_PROGRESS,
-                        "started_at": datetime.now(),
-                    }
+            if parent_ids:
+                await session.execute(
+                    update(Task)
+                    .where(Task.id.in_(parent_ids), Task.started_at.is_(None))
+                    .values(
+                        {
+                            "status": TaskStatus.IN_PROGRESS,
+                            "started_at": datetime.now(),
+                        }
+                    )
                 )
-            )
-            tasks_json = []
             for task in tasks:
                 task_dict = {
                     "id": task.id,
@@ -74,17 +134,27 @@ class TaskExecutor:
                 tasks_json.append(task_dict)
             await session.commit()
 
-        await asyncio.gather(
-            *(self.run_task(task_json, on_heartbeat=on_heartbeat) for task_json in tasks_json)
-        )
+        semaphore = asyncio.Semaphore(concurrency or len(tasks_json))
+
+        async def run_bounded(task_json):
+            # a task takes a slot only once its domain allows it to start,
+            # so that tasks of busy domains don't hold slots
+            async with domain_scheduler.slot(
+                task_json["data"].get("url") or "", on_heartbeat, limiter=semaphore
+            ):
+                return task_json["id"], await self.run_task(task_json, on_heartbeat=on_heartbeat)
+
+        return dict(await asyncio.gather(*(run_bounded(task_json) for task_json in tasks_json)))
 
-    async def run_task(self, task, on_heartbeat: Callable | None):
+    async def run_task(self, task, on_heartbeat: Callable | None) -> str | None:
         task_id = task["id"]
         scraper_name = task["scraper_name"]
         task_data = task["data"]
 
         fn = REGISTRY.get_scraping_function(scraper_name)
         exception_log = None
+        writer = self.get_completion_writer()
+        writer.task_started(task_id)
 
         try:
             loop = asyncio.get_running_loop()
@@ -102,14 +172,13 @@ class TaskExecutor:
                 result = asdict(result)
             if not isinstance(result, list):
                 result = [result]
-            await self.mark_tasks_as_success(
-                [task_id],
-                [result],
-            )
+            await writer.success(task_id, result)
+            await content_cache.set(scraper_name, task_data, result)
         except Exception:
             exception_log = traceback.format_exc()
             traceback.print_exc()
-            await self.mark_tasks_as_failure([task_id], [exception_log])
+            await writer.failure(task_id, exception_log)
+        return exception_log
 
     @db_retry
     async def mark_tasks_as_failure(self, task_ids: list[int], exception_logs: list[str]):
@@ -118,21 +187,15 @@ class TaskExecutor:
         if len(task_ids) != len(exception_logs):
             raise ValueError("task_ids and exception_logs must have the same length")
         async with get_async_session() as session:
-            mapping = {
-                tid: bindparam(f"result_{tid}", {"error": log}, type_=JSON)
-                for tid, log in zip(task_ids, exception_logs, strict=False)
-            }
-            result_case = case(mapping, value=Task.id, else_=Task.result)
-            await session.execute(
-                update(Task)
-                .where(Task.id.in_(task_ids))
-                .values(
-                    {
-                        "status": TaskStatus.FAILED,
-                        "finished_at": datetime.now(),
-                        "result": result_case,
-                    }
-                )
+            stored = await put_results(session, [{"error": log} for log in exception_logs])
+            await TaskHelper.finish_tasks(
+                session,
+                task_ids,
+                {
+                    "status": TaskStatus.FAILED,
+                    "finished_at": datetime.now(),
+                    **self._result_values(task_ids, stored),
+                },
             )
             await session.commit()
 
@@ -143,26 +206,28 @@ class TaskExecutor:
         if len(task_ids) != len(results):
             raise ValueError("task_ids and results must have the same length")
         async with get_async_session() as session:
-            result_mapping = {
-                tid: bindparam(f"result_{tid}", res, type_=JSON)
-                for tid, res in zip(task_ids, results, strict=False)
-            }
+            stored = await put_results(session, results)
             count_mapping = {tid: len(res) for tid, res in zip(task_ids, results, strict=False)}
-            result_case = case(result_mapping, value=Task.id, else_=Task.result)
             result_count_case = case(count_mapping, value=Task.id, else_=Task.result_count)
-            await session.execute(
-                update(Task)
-                .where(
-                    Task.id.in_(task_ids),
-                    Task.status.in_([TaskStatus.IN_PROGRESS]),
-                )
-                .values(
-                    {
-                        "result_count": result_count_case,
-                        "status": TaskStatus.COMPLETED,
-                        "finished_at": datetime.now(),
-                        "result": result_case,
-                    }
-                )
+            await TaskHelper.finish_tasks(
+                session,
+                task_ids,
+                {
+                    "result_count": result_count_case,
+                    "status": TaskStatus.COMPLETED,
+                    "finished_at": datetime.now(),
+                    **self._result_values(task_ids, stored),
+                },
+                in_status=[TaskStatus.IN_PROGRESS],
             )
             await session.commit()
+
+    @staticmethod
+    def _result_values(task_ids: list[int], stored: list[EncodedResult]) -> dict:
+        hash_mapping = {tid: item.hash for tid, item in zip(task_ids, stored, strict=False)}
+        size_mapping = {tid: item.size for tid, item in zip(task_ids, stored, strict=False)}
+        return {
+            "result": None,
+            "result_hash": case(hash_mapping, value=Task.id, else_=Task.result_hash),
+            "result_size": case(size_mapping, value=Task.id, else_=Task.result_size),
+        }
@@ -1,10 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from retrying import retry
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import Update, and_, case, delete, exists, func, insert, or_, select, update
+from sqlalchemy.orm import aliased
 
 from .db_setup import AsyncSession
-from .models import Task, TaskStatus
+from .models import Task, TaskChildResult, TaskStatus
+from .result_store import get_results, put_results
+
+DONE_STATUSES = [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.ABORTED]
 
 
 def db_retry(func=None, *, attempts: int = 3, delay: float = 10.0):
@@ -17,52 +21,203 @@ class TaskHelper:
     @staticmethod
     @db_retry
     async def are_all_child_task_done(session: AsyncSession, parent_id: int):
-        done_children_count = await TaskHelper.get_done_children_count(
-            session,
-            parent_id,
-        )
-        child_count = await TaskHelper.get_all_children_count(
-            session,
-            parent_id,
-        )
-        return done_children_count == child_count
+        total, done, _ = await TaskHelper.get_children_counts(session, parent_id)
+        return done == total
 
     @staticmethod
     @db_retry
-    async def get_all_children_count(
+    async def get_children_counts(session: AsyncSession, parent_id: int) -> tuple[int, int, int]:
+        """The total, done and failed children of a task, from its counters."""
+        row = (
+            await session.execute(
+                select(Task.child_total, Task.child_done, Task.child_failed).where(
+                    Task.id == parent_id
+                )
+            )
+        ).first()
+        return tuple(row) if row else (0, 0, 0)
+
+    @staticmethod
+    async def add_child_tasks(session: AsyncSession, parent_id: int, tasks: list[Task]):
+        for task in tasks:
+            task.parent_task_id = parent_id
+        session.add_all(tasks)
+        await session.execute(
+            update(Task)
+            .where(Task.id == parent_id)
+            .values(child_total=Task.child_total + len(tasks))
+        )
+
+    @staticmethod
+    async def finish_tasks(
         session: AsyncSession,
-        parent_id: int,
-        except_task_id: int | None = None,
+        task_ids: list[int],
+        values: dict,
+        in_status: list[str] | None = None,
     ):
-        query = select(func.count()).select_from(Task).where(Task.parent_task_id == parent_id)
-        if except_task_id:
-            query = query.where(Task.id != except_task_id)
-        return await session.scalar(query)
+        """
+        Update the given tasks with `values`, which set their final status, and in the
+        same statement update the counters of their parents and append the results of
+        the completed children to `task_child_results`. A parent is completed once all
+        its children are done.
+        """
+        targets = select(Task.id, Task.parent_task_id, Task.status).where(Task.id.in_(task_ids))
+        if in_status:
+            targets = targets.where(Task.status.in_(in_status))
+        targets = targets.with_for_update().cte("targets")
+
+        finished = (
+            update(Task)
+            .where(Task.id == targets.c.id)
+            .values(values)
+            .returning(
+                Task.id,
+                Task.status,
+                Task.result_hash,
+                Task.result_count,
+                targets.c.parent_task_id,
+                targets.c.status.label("previous_status"),
+            )
+            .cte("finished")
+        )
+
+        def changed(statuses: list[str]):
+            # +1 for a child that reached one of `statuses`, -1 for one that left them
+            return func.coalesce(
+                func.sum(
+                    case((finished.c.status.in_(statuses), 1), else_=0)
+                    - case((finished.c.previous_status.in_(statuses), 1), else_=0)
+                ),
+                0,
+            )
+
+        newly_completed = and_(
+            finished.c.parent_task_id.is_not(None),
+            finished.c.status == TaskStatus.COMPLETED,
+            finished.c.previous_status.is_distinct_from(TaskStatus.COMPLETED),
+        )
+        appended = (
+            insert(TaskChildResult)
+            .from_select(
+                ["parent_task_id", "child_task_id", "result_count", "result_hash"],
+                select(
+                    finished.c.parent_task_id,
+                    finished.c.id,
+                    finished.c.result_count,
+                    finished.c.result_hash,
+                ).where(newly_completed),
+            )
+            .cte("appended")
+        )
+
+        counts = (
+            select(
+                finished.c.parent_task_id,
+                changed(DONE_STATUSES).label("done"),
+                changed([TaskStatus.FAILED]).label("failed"),
+                func.coalesce(
+                    func.sum(case((newly_completed, finished.c.result_count), else_=0)), 0
+                ).label("result_count"),
+            )
+            .where(finished.c.parent_task_id.is_not(None))
+            .group_by(finished.c.parent_task_id)
+            .subquery("counts")
+        )
+        all_done = and_(
+            Task.child_total > 0,
+            Task.child_done + counts.c.done >= Task.child_total,
+            Task.status.not_in(DONE_STATUSES),
+        )
+        await session.execute(
+            update(Task)
+            .where(Task.id == counts.c.parent_task_id)
+            .values(
+                child_done=Task.child_done + counts.c.done,
+                child_failed=Task.child_failed + counts.c.failed,
+                result_count=func.coalesce(Task.result_count, 0) + counts.c.result_count,
+                status=case((all_done, TaskStatus.COMPLETED), else_=Task.status),
+                finished_at=case((all_done, func.now()), else_=Task.finished_at),
+            )
+            .add_cte(appended)
+        )
 
     @staticmethod
-    @db_retry
-    async def get_done_children_count(
+    async def claim_tasks(
         session: AsyncSession,
-        parent_id: int,
-        except_task_id: int | None = None,
-    ):
-        query = (
-            select(func.count())
-            .select_from(Task)
-            .where(
-                Task.parent_task_id == parent_id,
-                Task.status.in_(
-                    [
-                        TaskStatus.COMPLETED,
-                        TaskStatus.FAILED,
-                        TaskStatus.ABORTED,
-                    ]
+        task_ids: list[int] | None = None,
+        limit: int | None = None,
+        reclaim_after_sec: float | None = None,
+        scraper_names: list[str] | None = None,
+    ) -> list[Task]:
+        """
+        Atomically move claimable tasks to IN_PROGRESS and return them, most urgent first.
+        Claimable are the PENDING tasks and, with `reclaim_after_sec`, the IN_PROGRESS ones
+        started longer ago than that, whose worker is presumed dead.
+
+        Rows are locked with FOR UPDATE SKIP LOCKED, so concurrent claims never return the
+        same task, and a task claimed by a committed transaction isn't claimable anymore.
+        Without `task_ids` any claimable task is taken, except parent tasks. `scraper_names`
+        restricts the claim to the tasks of these scrapers.
+        """
+        tasks = (
+            await session.scalars(
+                TaskHelper.claim_statement(
+                    datetime.now(),
+                    task_ids=task_ids,
+                    limit=limit,
+                    reclaim_after_sec=reclaim_after_sec,
+                    scraper_names=scraper_names,
                 ),
+                execution_options={"synchronize_session": False},
             )
+        ).all()
+        # RETURNING doesn't keep the order of the subquery, NULLs come first as in Postgres
+        return sorted(
+            tasks,
+            key=lambda t: (t.sort_id is not None, -(t.sort_id or 0), t.is_sync is False, t.id),
+        )
+
+    @staticmethod
+    def claim_statement(
+        now: datetime,
+        task_ids: list[int] | None = None,
+        limit: int | None = None,
+        reclaim_after_sec: float | None = None,
+        scraper_names: list[str] | None = None,
+    ) -> Update:
+        """The UPDATE run by `claim_tasks`, `benchmarks/task_queries.py` checks its plan."""
+        # Both arms are covered by the partial `ix_tasks_claim_queue` index
+        claimable = Task.status == TaskStatus.PENDING
+        if reclaim_after_sec is not None:
+            claimable = or_(
+                claimable,
+                and_(
+                    Task.status == TaskStatus.IN_PROGRESS,
+                    Task.started_at < now - timedelta(seconds=reclaim_after_sec),
+                ),
+            )
+        candidates = (
+            select(Task.id)
+            .where(claimable)
+            .order_by(Task.sort_id.desc(), Task.is_sync.desc(), Task.id)
+            .with_for_update(skip_locked=True)
+        )
+        if task_ids is not None:
+            candidates = candidates.where(Task.id.in_(task_ids))
+        else:
+            child = aliased(Task)
+            candidates = candidates.where(~exists().where(child.parent_task_id == Task.id))
+        if scraper_names is not None:
+            candidates = candidates.where(Task.scraper_name.in_(scraper_names))
+        if limit:
+            candidates = candidates.limit(limit)
+
+        return (
+            update(Task)
+            .where(Task.id.in_(candidates.scalar_subquery()))
+            .values({"status": TaskStatus.IN_PROGRESS, "started_at": now})
+            .returning(Task)
         )
-        if except_task_id:
-            query = query.where(Task.id != except_task_id)
-        return await session.scalar(query)
 
     @staticmethod
     @retry(attempts=3, delay=1)
@@ -115,42 +270,67 @@ class TaskHelper:
 
     @staticmethod
     async def abort_task(session: AsyncSession, task_id: int):
-        query = (
-            update(Task)
-            .where(
-                Task.id == task_id,
-                Task.finished_at.is_(None),
-            )
-            .values({"finished_at": datetime.now()})
-        )
-        await session.execute(query)
-        return TaskHelper.update_task(
+        await TaskHelper.finish_tasks(
             session,
-            task_id,
+            [task_id],
             {
                 "status": TaskStatus.ABORTED,
+                "finished_at": func.coalesce(Task.finished_at, datetime.now()),
             },
         )
 
     @staticmethod
     @db_retry
     async def delete_task(session: AsyncSession, task_id: int):
-        await session.execute(
-            delete(Task).where(Task.id == task_id),
-        )
+        deleted = (
+            await session.execute(
+                delete(Task).where(Task.id == task_id).returning(Task.parent_task_id, Task.status)
+            )
+        ).first()
+        if deleted and deleted.parent_task_id:
+            await session.execute(
+                update(Task)
+                .where(Task.id == deleted.parent_task_id)
+                .values(
+                    child_total=Task.child_total - 1,
+                    child_done=Task.child_done - int(deleted.status in DONE_STATUSES),
+                    child_failed=Task.child_failed - int(deleted.status == TaskStatus.FAILED),
+                )
+            )
 
     @staticmethod
     @db_retry
-    async def update_parent_task_results(session: AsyncSession, parent_id, result):
-        from sqlalchemy import text
-
+    async def update_parent_task_results(
+        session: AsyncSession, parent_id, result, child_task_id: int | None = None
+    ):
+        [stored] = await put_results(session, [result])
+        session.add(
+            TaskChildResult(
+                parent_task_id=parent_id,
+                child_task_id=child_task_id,
+                result_count=len(result),
+                result_hash=stored.hash,
+            )
+        )
         await session.execute(
             update(Task)
             .where(Task.id == parent_id)
-            .values(
-                result_count=Task.result_count + len(result),
-                result=text("COALESCE(result, '[]'::json) || :new_result::json"),
-            ),
-            {"new_result": result},
+            .values(result_count=func.coalesce(Task.result_count, 0) + len(result))
         )
         await session.commit()
+
+    @staticmethod
+    async def get_child_results(session: AsyncSession, parent_id: int) -> list:
+        rows = (
+            await session.execute(
+                select(TaskChildResult.result_hash, TaskChildResult.result)
+                .where(TaskChildResult.parent_task_id == parent_id)
+                .order_by(TaskChildResult.id)
+            )
+        ).all()
+        stored = await get_results(session, (row.result_hash for row in rows))
+        return [
+            item
+            for row in rows
+            for item in (stored.get(row.result_hash) if row.result_hash else row.result) or []
+        ]
@@ -0,0 +1,32 @@
+import asyncio
+import traceback
+
+from .browsers import browser_pool
+from .db_setup import create_database
+from .settings import settings
+from .task_executor import TaskExecutor
+
+
+async def run_puller():
+    """
+    Pull PENDING tasks straight from the database, batch by batch, without Temporal.
+    Replicas share the queue safely as every batch is claimed with SKIP LOCKED.
+    """
+    await asyncio.to_thread(create_database)
+    executor = TaskExecutor()
+    await asyncio.to_thread(browser_pool.warm)
+    print("Task puller started")
+    while True:
+        try:
+            outcomes = await executor.process_pending(
+                settings.task_pull_batch_size,
+                concurrency=settings.task_pull_concurrency,
+            )
+        except Exception:
+            traceback.print_exc()
+            outcomes = {}
+        if outcomes:
+            failed = sum(1 for error in outcomes.values() if error)
+            print(f"Processed {len(outcomes)} tasks, {failed} failed")
+        else:
+            await asyncio.sleep(settings.task_pull_idle_sec)
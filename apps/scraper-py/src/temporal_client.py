@@ -29,6 +29,6 @@ async def run_scrape_workflow(task_ids: list[int]) -> None:
         "runScrapeTasks",
         id=uuid4().hex,
         task_queue="scraper-tasks",
-        args=[task_ids],
+        args=[task_ids, settings.scrape_batch_size, settings.scrape_batch_concurrency],
         retry_policy=workflow_retry_policy,
     )
@@ -1,12 +1,19 @@
+import asyncio
+
 from temporalio.worker import Worker
 
 from .activities import scraper_activities
+from .browsers import browser_pool
+from .db_setup import create_database
 from .temporal_client import get_temporal_client
 from .workflows import scraper_workflows
 
 
 async def run_worker():
+    await asyncio.to_thread(create_database)
     client = await get_temporal_client()
+    # Launch browsers upfront so that the first tasks don't pay the startup cost
+    await asyncio.to_thread(browser_pool.warm)
     worker = Worker(
         client,
         task_queue="scraper-tasks",
@@ -5,18 +5,43 @@ from time import monotonic
 from typing import Any
 
 from bs4 import BeautifulSoup
-from markdownify import markdownify as md
+from markdownify import MarkdownConverter
 
+CHALLENGE_IFRAME_TITLE = "human verification challenge"
 
-def convert_to_markdown(html: str, remove_ul: bool = True) -> str:
-    soup = BeautifulSoup(html, "html.parser")
+
+@dataclass
+class ParsedPage:
+    markdown: str
+    has_challenge_iframe: bool
+    # The HTML was cut to the conversion size limit, see `conversion.ConversionExecutor`
+    truncated: bool = False
+
+
+def parse_page(html: str, remove_ul: bool = True) -> ParsedPage:
+    """
+    Parse the page once and derive everything the scrapers need from the same tree:
+    the markdown and whether the page embeds a human verification challenge.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    has_challenge_iframe = any(
+        CHALLENGE_IFRAME_TITLE in (iframe.get("title") or "").casefold()
+        for iframe in soup.find_all("iframe")
+    )
     tags_to_remove = ["a", "img"] + (["ul", "ol", "li"] if remove_ul else [])
     for element in soup.find_all(tags_to_remove):
         if element.name == "a":
             element.replace_with(element.get_text())
         else:
             element.decompose()
-    return md(str(soup))
+    return ParsedPage(
+        markdown=MarkdownConverter().convert_soup(soup),
+        has_challenge_iframe=has_challenge_iframe,
+    )
+
+
+def convert_to_markdown(html: str, remove_ul: bool = True) -> str:
+    return parse_page(html, remove_ul=remove_ul).markdown
 
 
 async def execute_concurrently[TaskResultT](
@@ -5,7 +5,8 @@ from temporalio import common, workflow
 from temporalio.exceptions import ApplicationError
 
 with workflow.unsafe.imports_passed_through():
-    from .activities import mark_tasks_as_failed, run_scraper
+    from .activities import mark_tasks_as_failed, run_scraper, run_scraper_batch
+    from .domain_scheduler import domain_scheduler
     from .utils import execute_concurrently_stat
 
 
@@ -23,10 +24,26 @@ workflow_retry_policy = common.RetryPolicy(
 )
 
 
+def batch_timeout(batch_size: int) -> timedelta:
+    # All tasks of a batch may be of one domain that runs them one at a time,
+    # each after its domain's interval, stretched by the bot detection backoff
+    task_timeout = activity_timeout + timedelta(seconds=domain_scheduler.max_interval_sec())
+    return task_timeout * batch_size
+
+
 @workflow.defn(name="runScrapeTasks")
 class ScrapeWorkflow:
     @workflow.run
-    async def run(self, task_ids: list[int]) -> None:
+    async def run(
+        self,
+        task_ids: list[int],
+        batch_size: int = 1,
+        batch_concurrency: int = 1,
+    ) -> None:
+        if batch_size > 1:
+            await self._run_batches(task_ids, batch_size, batch_concurrency)
+            return
+
         activities: workflow.ActivityHandle[None] = []
         for task_id in task_ids:
             activities.append(
@@ -43,6 +60,31 @@ class ScrapeWorkflow:
             (task_ids[index], cast(ApplicationError, error).message)
             for index, error in errors.items()
         ]
+        await self._mark_failed(failed_tasks)
+
+    async def _run_batches(self, task_ids: list[int], batch_size: int, concurrency: int) -> None:
+        batches = [task_ids[i : i + batch_size] for i in range(0, len(task_ids), batch_size)]
+        activities = [
+            workflow.execute_activity(
+                run_scraper_batch,
+                args=[batch, concurrency],
+                start_to_close_timeout=batch_timeout(len(batch)),
+                heartbeat_timeout=heartbeat_timeout,
+                retry_policy=retry_policy,
+            )
+            for batch in batches
+        ]
+        _, errors, _ = await execute_concurrently_stat(activities)
+        # Failures of single tasks are recorded by the batch itself,
+        # only batches that failed as a whole are left to mark here
+        failed_tasks = [
+            (task_id, cast(ApplicationError, error).message)
+            for index, error in errors.items()
+            for task_id in batches[index]
+        ]
+        await self._mark_failed(failed_tasks)
+
+    async def _mark_failed(self, failed_tasks: list[tuple[int, str]]) -> None:
         if failed_tasks:
             await workflow.execute_activity(
                 mark_tasks_as_failed,
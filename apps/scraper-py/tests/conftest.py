@@ -0,0 +1,55 @@
+import asyncio
+import os
+from collections.abc import Awaitable, Callable
+
+import pytest
+from sqlalchemy import NullPool, create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# e.g. postgresql://postgres@localhost/scraper_test, the tests run in a scratch schema
+TEST_DB_URL = os.environ.get("TEST_DB_URL")
+# `settings` need a DB_URL to be imported, nothing connects to it on import
+os.environ.setdefault("DB_URL", TEST_DB_URL or "postgresql://localhost/scraper_test")
+
+SCHEMA = "test_scraper"
+
+
+@pytest.fixture
+def database() -> str:
+    """Fresh tables in the scratch schema of the test database, dropped after the test."""
+    if not TEST_DB_URL:
+        pytest.skip("TEST_DB_URL is not set")
+
+    from src.models import Base
+
+    engine = create_engine(TEST_DB_URL)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        Base.metadata.create_all(connection)
+    yield TEST_DB_URL
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+@pytest.fixture
+def run_with_sessions(database: str):
+    """Run a coroutine function, passing it a session maker of the scratch schema."""
+
+    def run(test: Callable[[async_sessionmaker], Awaitable]):
+        async def main():
+            engine = create_async_engine(
+                database.replace("postgresql://", "postgresql+asyncpg://", 1),
+                poolclass=NullPool,
+                connect_args={"server_settings": {"search_path": SCHEMA}},
+            )
+            try:
+                return await test(async_sessionmaker(bind=engine, expire_on_commit=False))
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from src.models import Task, TaskChildResult, TaskStatus
+from src.task_helper import TaskHelper
+
+
+def new_task(**values) -> Task:
+    return Task(
+        **{
+            "status": TaskStatus.PENDING,
+            "sort_id": 1,
+            "scraper_name": "scrape_md",
+            "is_sync": False,
+            "data": {},
+            **values,
+        }
+    )
+
+
+async def add_tasks(sessions, tasks: list[Task]) -> list[int]:
+    async with sessions() as session:
+        session.add_all(tasks)
+        await session.commit()
+        return [task.id for task in tasks]
+
+
+async def add_parent_with_children(sessions, count: int) -> tuple[int, list[int]]:
+    async with sessions() as session:
+        parent = new_task(status=TaskStatus.IN_PROGRESS)
+        session.add(parent)
+        await session.flush()
+        children = [new_task(status=TaskStatus.IN_PROGRESS) for _ in range(count)]
+        await TaskHelper.add_child_tasks(session, parent.id, children)
+        await session.commit()
+        return parent.id, [child.id for child in children]
+
+
+async def finish(sessions, task_ids: list[int], status: str, **kwargs) -> None:
+    async with sessions() as session:
+        await TaskHelper.finish_tasks(
+            session, task_ids, {"status": status, "finished_at": datetime.now()}, **kwargs
+        )
+        await session.commit()
+
+
+async def get_task(sessions, task_id: int) -> Task:
+    async with sessions() as session:
+        return await session.get(Task, task_id)
+
+
+def test_concurrent_claims_never_return_the_same_task(run_with_sessions):
+    async def test(sessions):
+        task_ids = await add_tasks(sessions, [new_task() for _ in range(20)])
+
+        async def claim() -> list[int]:
+            async with sessions() as session:
+                tasks = await TaskHelper.claim_tasks(session, limit=3)
+                # keep the rows locked while the other claims run
+                await asyncio.sleep(0.1)
+                await session.commit()
+                return [task.id for task in tasks]
+
+        claims = await asyncio.gather(*(claim() for _ in range(8)))
+        claimed = [task_id for ids in claims for task_id in ids]
+        assert len(claimed) == len(set(claimed))
+        assert set(claimed) <= set(task_ids)
+        assert sum(1 for ids in claims if ids) > 1
+
+        async with sessions() as session:
+            assert await TaskHelper.claim_tasks(session, task_ids=claimed) == []
+
+    run_with_sessions(test)
+
+
+def test_claim_reclaims_stale_in_progress_tasks(run_with_sessions):
+    async def test(sessions):
+        stale_id, running_id = await add_tasks(
+            sessions,
+            [
+                new_task(
+                    status=TaskStatus.IN_PROGRESS,
+                    started_at=datetime.now() - timedelta(hours=1),
+                ),
+                new_task(status=TaskStatus.IN_PROGRESS, started_at=datetime.now()),
+            ],
+        )
+
+        async with sessions() as session:
+            assert await TaskHelper.claim_tasks(session, limit=10) == []
+            tasks = await TaskHelper.claim_tasks(session, limit=10, reclaim_after_sec=600)
+            await session.commit()
+        assert [task.id for task in tasks] == [stale_id]
+        assert tasks[0].started_at > datetime.now() - timedelta(minutes=1)
+
+        async with sessions() as session:
+            tasks = await TaskHelper.claim_tasks(session, limit=10, reclaim_after_sec=600)
+        assert tasks == []
+        assert (await get_task(sessions, running_id)).status == TaskStatus.IN_PROGRESS
+
+    run_with_sessions(test)
+
+
+def test_failing_a_failed_child_again_counts_it_once(run_with_sessions):
+    async def test(sessions):
+        parent_id, (child_id, _) = await add_parent_with_children(sessions, 2)
+
+        await finish(sessions, [child_id], TaskStatus.FAILED)
+        await finish(sessions, [child_id], TaskStatus.FAILED)
+
+        parent = await get_task(sessions, parent_id)
+        assert (parent.child_total, parent.child_done, parent.child_failed) == (2, 1, 1)
+        assert parent.status == TaskStatus.IN_PROGRESS
+
+    run_with_sessions(test)
+
+
+def test_parent_completes_once_when_children_finish_concurrently(run_with_sessions):
+    async def test(sessions):
+        parent_id, child_ids = await add_parent_with_children(sessions, 4)
+
+        await asyncio.gather(
+            *(
+                finish(
+                    sessions, [child_id], TaskStatus.COMPLETED, in_status=[TaskStatus.IN_PROGRESS]
+                )
+                for child_id in child_ids
+            )
+        )
+        parent = await get_task(sessions, parent_id)
+        assert (parent.child_done, parent.child_failed) == (4, 0)
+        assert parent.status == TaskStatus.COMPLETED
+        finished_at = parent.finished_at
+
+        # a retried completion is not counted nor appended again
+        await finish(sessions, child_ids[:1], TaskStatus.COMPLETED)
+        parent = await get_task(sessions, parent_id)
+        assert (parent.child_done, parent.finished_at) == (4, finished_at)
+
+        async with sessions() as session:
+            appended = await session.scalar(
+                select(func.count())
+                .select_from(TaskChildResult)
+                .where(TaskChildResult.parent_task_id == parent_id)
+            )
+        assert appended == 4
+
+    run_with_sessions(test)